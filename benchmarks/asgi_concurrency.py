@@ -0,0 +1,133 @@
+"""
+Concurrent slow clients against running servers, e.g. the `web` (WSGI,
+runserver) and `asgi` (uvicorn, INSURED_ASYNC_VIEWS=True) services of
+docker-compose.yml.
+
+Registers one insured (@bench.invalid e-mail, not deleted) and logs in on
+each server. Then --clients connections at once each PATCH its profile,
+sending half of the body, waiting --delay seconds, then the rest. Reports
+how many completed, their p50/p99 latency and the throughput.
+
+Raise the open files limit (`ulimit -n`) above --clients on both sides.
+
+Usage: python benchmarks/asgi_concurrency.py http://localhost:8000 http://localhost:8001
+       [--clients 2000] [--delay 1.0] [--timeout 60]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from urllib.parse import urlsplit
+
+EMAIL_DOMAIN = 'bench.invalid'
+
+
+def make_cpf():
+    digits = [random.randrange(10) for _ in range(9)]
+    for length in (9, 10):
+        total = sum(digit * (length + 1 - i) for i, digit in enumerate(digits))
+        digits.append(total * 10 % 11 % 10)
+    return ''.join(map(str, digits))
+
+
+async def request(url, method, path, payload=None, token=None, delay=0.0):
+    """
+    Sends one HTTP/1.1 request on its own connection, returning the status
+    and the decoded JSON body.
+    """
+    url = urlsplit(url)
+    body = json.dumps(payload).encode() if payload is not None else b''
+    head = [
+        f'{method} {path} HTTP/1.1',
+        f'Host: {url.netloc}',
+        'Connection: close',
+        'Content-Type: application/json',
+        f'Content-Length: {len(body)}',
+    ]
+    if token:
+        head.append(f'Authorization: Bearer {token}')
+
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    try:
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode())
+        if delay:
+            writer.write(body[:len(body) // 2])
+            await writer.drain()
+            await asyncio.sleep(delay)
+            body = body[len(body) // 2:]
+        writer.write(body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+
+    head, _, content = response.partition(b'\r\n\r\n')
+    if b'chunked' in head.lower():
+        content = b''.join(content.split(b'\r\n')[1::2])
+    return int(head.split(b' ', 2)[1]), json.loads(content or b'null')
+
+
+async def log_in(url):
+    email = f'asgi-{random.randrange(10 ** 12)}@{EMAIL_DOMAIN}'
+    password = 'bench-Pa55word'
+    status, data = await request(url, 'POST', '/api/v1/insureds/', {
+        'name': 'Bench Insured', 'email': email, 'cpf': make_cpf(), 'password': password,
+    })
+    assert status == 200, (status, data)
+    status, data = await request(url, 'POST', '/api/v1/login/', {'email': email, 'password': password})
+    assert status == 200, (status, data)
+    return data['access']
+
+
+async def slow_client(url, token, index, delay, timeout):
+    started = time.perf_counter()
+    try:
+        status, _ = await asyncio.wait_for(
+            request(url, 'PATCH', '/api/v1/insureds/edit/', {'name': f'Bench Insured {index}'}, token, delay),
+            timeout,
+        )
+    except (OSError, asyncio.TimeoutError, ValueError, IndexError) as exc:
+        return type(exc).__name__, None
+    return status, time.perf_counter() - started
+
+
+async def run(url, clients, delay, timeout):
+    token = await log_in(url)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(slow_client(url, token, i, delay, timeout) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for status, latency in results if status == 200)
+    failures = {}
+    for status, _ in results:
+        if status != 200:
+            failures[status] = failures.get(status, 0) + 1
+
+    print(url)
+    print(f"  completed  {len(latencies):>8} / {clients}")
+    if failures:
+        print(f"  failed     {', '.join(f'{status}: {count}' for status, count in failures.items())}")
+    if latencies:
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"  p50        {statistics.median(latencies) * 1000:8.0f} ms")
+        print(f"  p99        {p99 * 1000:8.0f} ms")
+    print(f"  throughput {len(latencies) / elapsed:8.1f} requests/s ({elapsed:.1f} s)\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='+', help='base URL of each server, e.g. http://localhost:8001')
+    parser.add_argument('--clients', type=int, default=2000, help='concurrent connections')
+    parser.add_argument('--delay', type=float, default=1.0, help='seconds each client pauses mid-body')
+    parser.add_argument('--timeout', type=float, default=60.0, help='seconds before a request counts as failed')
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.delay:g} s pause each\n")
+    for url in args.urls:
+        asyncio.run(run(url, args.clients, args.delay, args.timeout))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares validate_cpf called in a loop with validate_cpf_batch.
+
+Usage: python benchmarks/cpf_validation.py [count]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings  # noqa: E402
+
+settings.configure(USE_I18N=False)
+
+from django.core.exceptions import ValidationError  # noqa: E402
+
+from core_app.validators import validate_cpf, validate_cpf_batch  # noqa: E402
+
+
+def make_cpfs(count, seed=42):
+    """
+    Random cpfs, about half of them with valid check digits.
+    """
+    rng = np.random.default_rng(seed)
+    digits = rng.integers(0, 10, size=(count, 11))
+    r1 = digits[:, :9] @ np.arange(10, 1, -1) % 11
+    digits[:, 9] = np.where(r1 < 2, 0, 11 - r1)
+    r2 = (digits[:, :10] @ np.arange(11, 1, -1)) % 11
+    digits[:, 10] = np.where(r2 < 2, 0, 11 - r2)
+    corrupt = rng.random(count) < 0.5
+    digits[corrupt, 10] = (digits[corrupt, 10] + 1) % 10
+    return [''.join(map(str, row)) for row in digits.tolist()]
+
+
+def scalar(values):
+    mask = []
+    for value in values:
+        try:
+            validate_cpf(value)
+            mask.append(True)
+        except ValidationError:
+            mask.append(False)
+    return np.array(mask)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    values = make_cpfs(count)
+
+    started = time.perf_counter()
+    expected = scalar(values)
+    scalar_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    mask, _ = validate_cpf_batch(values)
+    batch_time = time.perf_counter() - started
+
+    assert (mask == expected).all(), "validate_cpf_batch disagrees with validate_cpf"
+    print(f"{count} cpfs, {int(expected.sum())} valid")
+    print(f"validate_cpf (loop)  {scalar_time:8.3f}s  {count / scalar_time:12,.0f} cpf/s")
+    print(f"validate_cpf_batch   {batch_time:8.3f}s  {count / batch_time:12,.0f} cpf/s")
+    print(f"speedup              {scalar_time / batch_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
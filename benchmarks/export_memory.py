@@ -0,0 +1,97 @@
+"""
+Peak Python memory and throughput of the streaming export of insureds
+(core_app.export, NDJSON and gzipped CSV) against serializing the whole
+queryset with InsuredReadSerializer and rendering it at once, over tables
+of growing size.
+
+Runs against the database of the project settings, which must be migrated.
+Seeded rows use the @bench.invalid e-mail domain and are deleted at the end.
+Memory is traced with tracemalloc, which does not see the buffers of the
+database driver.
+
+Usage: python benchmarks/export_memory.py [--rows 50000 100000 200000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'setup.settings')
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+
+from core_app.export import export_records, stream_export  # noqa: E402
+from core_app.models import Insured  # noqa: E402
+from core_app.renderers import FastJSONRenderer  # noqa: E402
+from core_app.serializers import InsuredReadSerializer  # noqa: E402
+
+EMAIL_DOMAIN = 'bench.invalid'
+
+
+def seed(start, stop):
+    batch = []
+    for i in range(start, stop):
+        batch.append(Insured(password='!', name=f'Bench Insured {i}', cpf=f'{i:011d}', email=f'bench{i}@{EMAIL_DOMAIN}'))
+        if len(batch) == 10_000:
+            with transaction.atomic():
+                Insured.objects.bulk_create(batch)
+            batch = []
+    with transaction.atomic():
+        Insured.objects.bulk_create(batch)
+
+
+def in_memory():
+    return len(FastJSONRenderer().render(InsuredReadSerializer(Insured.objects.order_by('pk'), many=True).data))
+
+
+def streamed(file_format, compress):
+    def run():
+        return sum(len(chunk) for chunk in stream_export(export_records(), file_format, compress=compress))
+    return run
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[50_000, 100_000, 200_000])
+    args = parser.parse_args()
+
+    cases = [
+        ('serializer + render', in_memory),
+        ('stream ndjson', streamed('ndjson', False)),
+        ('stream csv.gz', streamed('csv', True)),
+    ]
+    existing = Insured.objects.count()
+    seeded = 0
+    print(f"{connection.vendor}, {existing} insureds before seeding\n")
+    print(f"{'rows':>8} {'case':22} {'peak MB':>9} {'rows/s':>10} {'output MB':>10}")
+    try:
+        for rows in sorted(args.rows):
+            seed(seeded, rows)
+            seeded = rows
+            total = existing + rows
+            for name, fn in cases:
+                peak, elapsed, size = measure(fn)
+                print(f"{total:8} {name:22} {peak / 2 ** 20:9.1f} {total / elapsed:10.0f} {size / 2 ** 20:10.1f}")
+            print()
+    finally:
+        deleted, _ = Insured.objects.filter(email__endswith='@' + EMAIL_DOMAIN).delete()
+        print(f"deleted {deleted} seeded insureds")
+
+
+if __name__ == '__main__':
+    main()
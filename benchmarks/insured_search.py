@@ -0,0 +1,154 @@
+"""
+Latency of the back-office search per query shape (name substring, CPF
+prefix) over a seeded table of insureds.
+
+Runs against the database of the project settings, which must be migrated.
+Seeded rows use the @bench.invalid e-mail domain and are deleted at the end
+unless --keep is given, so a later run can reuse them with --rows 0.
+
+Usage: python benchmarks/insured_search.py [--rows 1000000] [--runs 200] [--keep] [--explain]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'setup.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from rest_framework.test import APIRequestFactory, force_authenticate  # noqa: E402
+
+from core_app.models import Insured  # noqa: E402
+from core_app.serializers import InsuredSearchSerializer  # noqa: E402
+from core_app.views import InsuredBackofficeSearchView  # noqa: E402
+
+FIRST_NAMES = ['Maria', 'José', 'Ana', 'João', 'Antônio', 'Francisca', 'Carlos', 'Paulo', 'Adriana', 'Lucas',
+               'Juliana', 'Marcos', 'Patrícia', 'Pedro', 'Aline', 'Rafael', 'Camila', 'Bruno', 'Letícia', 'Marcus']
+MIDDLE_NAMES = ['da', 'de', 'dos', 'Alves', 'Lima', 'Gomes', 'Ribeiro', 'Martins', 'Rocha', 'Barbosa', 'Teixeira']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Pereira', 'Carvalho', 'Almeida',
+              'Nascimento', 'Araújo', 'Cavalcanti', 'Quixabeira', 'Figueiredo', 'Vasconcelos', 'Bittencourt', 'Monteiro']
+# CPF_MODULUS is prime, so i * CPF_FACTOR % CPF_MODULUS gives distinct,
+# evenly spread 11 digit cpfs.
+CPF_MODULUS = 99_999_999_977
+CPF_FACTOR = 61_803_398_875
+EMAIL_DOMAIN = 'bench.invalid'
+
+SHAPES = [
+    ('name, common last name', 'Silva'),
+    ('name, rare last name', 'Quixabeira'),
+    ('name, first + middle', 'Paulo Teixeira'),
+    ('name, no match', 'Zyxwvut'),
+]
+# Prefixes of the cpf of the first seeded row.
+_CPF = f'{CPF_FACTOR % CPF_MODULUS:011d}'
+SHAPES += [
+    ('cpf, 3 digit prefix', _CPF[:3]),
+    ('cpf, 6 digit prefix', f'{_CPF[:3]}.{_CPF[3:6]}'),
+    ('cpf, 9 digit prefix', f'{_CPF[:3]}.{_CPF[3:6]}.{_CPF[6:9]}'),
+    ('cpf, no match', '000.000.000'),
+]
+
+
+def seed(rows):
+    started = time.perf_counter()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO core_app_insured (password, name, cpf, email, created_at, updated_at)
+                SELECT '!',
+                       (%(first)s::text[])[1 + i %% %(n_first)s] || ' ' ||
+                       (%(middle)s::text[])[1 + (i / 7) %% %(n_middle)s] || ' ' ||
+                       (%(last)s::text[])[1 + (i / 13) %% %(n_last)s],
+                       lpad(((i::bigint * {CPF_FACTOR}) %% {CPF_MODULUS})::text, 11, '0'),
+                       'bench' || i || '@{EMAIL_DOMAIN}',
+                       now() - i * interval '1 second',
+                       now()
+                FROM generate_series(1, %(rows)s) AS i
+                """,
+                {
+                    'first': FIRST_NAMES, 'n_first': len(FIRST_NAMES),
+                    'middle': MIDDLE_NAMES, 'n_middle': len(MIDDLE_NAMES),
+                    'last': LAST_NAMES, 'n_last': len(LAST_NAMES),
+                    'rows': rows,
+                },
+            )
+            cursor.execute('ANALYZE core_app_insured')
+    else:
+        batch = []
+        for i in range(1, rows + 1):
+            batch.append(Insured(
+                password='!',
+                name=f'{FIRST_NAMES[i % len(FIRST_NAMES)]} {MIDDLE_NAMES[i // 7 % len(MIDDLE_NAMES)]} '
+                     f'{LAST_NAMES[i // 13 % len(LAST_NAMES)]}',
+                cpf=f'{i * CPF_FACTOR % CPF_MODULUS:011d}',
+                email=f'bench{i}@{EMAIL_DOMAIN}',
+            ))
+            if len(batch) == 10_000:
+                with transaction.atomic():
+                    Insured.objects.bulk_create(batch)
+                batch = []
+        with transaction.atomic():
+            Insured.objects.bulk_create(batch)
+    print(f"seeded {rows} insureds in {time.perf_counter() - started:.1f}s")
+
+
+def measure(view, factory, admin, term, runs):
+    timings = []
+    for _ in range(runs):
+        request = factory.get('/api/v1/backoffice/insureds/search/', {'q': term}, HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        force_authenticate(request, user=admin)
+        started = time.perf_counter()
+        response = view(request)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.data
+    timings.sort()
+    return (
+        statistics.median(timings),
+        timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        len(response.data['results']),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--keep', action='store_true', help="Keep the seeded rows.")
+    parser.add_argument('--explain', action='store_true', help="Print the plan of each query.")
+    args = parser.parse_args()
+
+    if args.rows:
+        seed(args.rows)
+    total = Insured.objects.count()
+    print(f"{total} insureds, {connection.vendor}, {args.runs} runs per shape\n")
+
+    view = InsuredBackofficeSearchView.as_view()
+    factory = APIRequestFactory()
+    admin = User(username='bench', is_staff=True, is_superuser=True)
+
+    try:
+        print(f"{'shape':28} {'term':16} {'p50 ms':>9} {'p99 ms':>9} {'rows':>5}")
+        for shape, term in SHAPES:
+            p50, p99, found = measure(view, factory, admin, term, args.runs)
+            print(f"{shape:28} {term:16} {p50:9.2f} {p99:9.2f} {found:5}")
+            if args.explain:
+                search = InsuredSearchSerializer(data={'q': term})
+                search.is_valid(raise_exception=True)
+                queryset = search.filter(Insured.objects.all()).order_by('-created_at', '-id')[:51]
+                print(queryset.explain(), end='\n\n')
+    finally:
+        if not args.keep:
+            deleted, _ = Insured.objects.filter(email__endswith='@' + EMAIL_DOMAIN).delete()
+            print(f"\ndeleted {deleted} seeded insureds")
+
+
+if __name__ == '__main__':
+    main()
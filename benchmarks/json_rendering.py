@@ -0,0 +1,72 @@
+"""
+Throughput of DRF's JSONRenderer/JSONParser (stdlib json) against
+FastJSONRenderer/FastJSONParser (orjson, when installed) on InsuredSerializer
+payloads of 1, 100 and 10k records.
+
+Serializes unsaved Insureds, without a database.
+
+Usage: python benchmarks/json_rendering.py [seconds per case]
+"""
+import io
+import os
+import sys
+import time
+from datetime import timedelta
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'setup.settings')
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from core_app.models import Insured  # noqa: E402
+from core_app.parsers import FastJSONParser  # noqa: E402
+from core_app.renderers import FastJSONRenderer, orjson  # noqa: E402
+from core_app.serializers import InsuredSerializer  # noqa: E402
+
+
+def make_payload(count):
+    now = timezone.now()
+    insureds = [
+        Insured(
+            pk=i, name=f'Insured Número {i}', email=f'insured{i}@example.com', cpf=f'{i:011d}',
+            created_at=now - timedelta(days=i), updated_at=now - timedelta(hours=i),
+        )
+        for i in range(count)
+    ]
+    return InsuredSerializer(insureds, many=True).data
+
+
+def throughput(fn, seconds):
+    calls = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        fn()
+        calls += 1
+    return calls / elapsed
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    print(f"orjson {orjson.__version__ if orjson else 'not installed, both sides use the stdlib'}\n")
+    print(f"{'records':>8} {'':6} {'stdlib/s':>12} {'fast/s':>12} {'speedup':>8}")
+
+    for count in (1, 100, 10_000):
+        data = make_payload(count)
+        content = JSONRenderer().render(data)
+        assert FastJSONParser().parse(io.BytesIO(FastJSONRenderer().render(data))) == JSONParser().parse(io.BytesIO(content))
+
+        for name, stdlib, fast in (
+            ('render', lambda: JSONRenderer().render(data), lambda: FastJSONRenderer().render(data)),
+            ('parse', lambda: JSONParser().parse(io.BytesIO(content)), lambda: FastJSONParser().parse(io.BytesIO(content))),
+        ):
+            slow_rate, fast_rate = throughput(stdlib, seconds), throughput(fast, seconds)
+            print(f"{count:>8} {name:6} {slow_rate:12,.0f} {fast_rate:12,.0f} {fast_rate / slow_rate:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Decode throughput per algorithm: jwt.decode parsing the key material on every
+call, as the authenticator used to, against the preloaded key ring.
+
+Asymmetric algorithms need the cryptography package and are skipped without it.
+
+Usage: python benchmarks/jwt_decode.py [iterations]
+"""
+import os
+import sys
+import time
+
+import django
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings  # noqa: E402
+
+
+def make_keys():
+    keys = {'HS256': ('benchmark-secret', 'benchmark-secret')}
+    if not jwt.algorithms.has_crypto:
+        return keys
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    for algorithm, private_key in (
+        ('RS256', rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+        ('ES256', ec.generate_private_key(ec.SECP256R1())),
+        ('EdDSA', ed25519.Ed25519PrivateKey.generate()),
+    ):
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+        ).decode()
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode()
+        keys[algorithm] = (private_pem, public_pem)
+    return keys
+
+
+def throughput(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - started)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    keys = make_keys()
+    settings.configure(JWT_KEY_RING={
+        'ACTIVE_KID': '',
+        'KEYS': [
+            {'kid': algorithm, 'algorithm': algorithm, 'signing_key': private, 'verifying_key': public}
+            for algorithm, (private, public) in keys.items()
+        ],
+        'KEYS_FILE': '',
+    }, SECRET_KEY='benchmark', INSTALLED_APPS=['django.contrib.auth', 'django.contrib.contenttypes'])
+    django.setup()
+    from core_app.keyring import key_ring
+
+    print(f"{'algorithm':<10}{'per-call key parsing':>24}{'key ring':>16}")
+    for algorithm, (private, public) in keys.items():
+        payload = {'user_id': '1', 'token_type': 'access', 'exp': int(time.time()) + 3600}
+        token = jwt.encode(payload, private, algorithm=algorithm, headers={'kid': algorithm})
+        naive = throughput(lambda: jwt.decode(token, public, algorithms=[algorithm]), iterations)
+        ring = throughput(lambda: key_ring.decode(token), iterations)
+        print(f"{algorithm:<10}{naive:>18,.0f} tok/s{ring:>10,.0f} tok/s")
+
+
+if __name__ == '__main__':
+    main()
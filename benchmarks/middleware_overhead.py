@@ -0,0 +1,64 @@
+"""
+Per-request overhead of the middleware chains: the full MIDDLEWARE against
+API_MIDDLEWARE, on a view doing no work, and on GET /api/v1/metrics/
+without credentials (a DRF view answering 401, no database access).
+
+Runs the WSGI handlers in-process, without a server or database.
+
+Usage: python benchmarks/middleware_overhead.py [requests]
+"""
+import os
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'setup.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.urls import clear_url_caches, path  # noqa: E402
+
+from setup.handlers import APIWSGIHandler  # noqa: E402
+from setup.urls import urlpatterns  # noqa: E402
+
+# A view that does nothing, so only the middleware is measured.
+urlpatterns.insert(0, path('api/v1/noop/', lambda request: HttpResponse(b'')))
+clear_url_caches()
+
+
+def per_request(handler, environ, expected, count):
+    def start_response(status, headers):
+        assert status.startswith(expected), status
+
+    for _ in range(100):
+        handler(dict(environ), start_response)
+    started = time.perf_counter()
+    for _ in range(count):
+        handler(dict(environ), start_response)
+    return (time.perf_counter() - started) / count * 1_000_000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    factory = RequestFactory()
+    handlers = [('MIDDLEWARE', WSGIHandler()), ('API_MIDDLEWARE', APIWSGIHandler())]
+    print(f"MIDDLEWARE:     {len(settings.MIDDLEWARE)} classes")
+    print(f"API_MIDDLEWARE: {len(settings.API_MIDDLEWARE)} classes\n")
+
+    for url, expected in (('/api/v1/noop/', '200'), ('/api/v1/metrics/', '401')):
+        environ = factory._base_environ(PATH_INFO=url, HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        timings = {name: per_request(handler, environ, expected, count) for name, handler in handlers}
+        full, api = timings['MIDDLEWARE'], timings['API_MIDDLEWARE']
+        print(url)
+        print(f"  MIDDLEWARE      {full:8.1f} µs/request")
+        print(f"  API_MIDDLEWARE  {api:8.1f} µs/request")
+        print(f"  saved           {full - api:8.1f} µs/request ({(full - api) / full:.0%})\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Throughput of InsuredSerializer (ModelSerializer) against the precompiled
+InsuredReadSerializer, on one Insured and on lists of 10k, from model
+instances and from `.values()`-like rows.
+
+Serializes unsaved Insureds, without a database.
+
+Usage: python benchmarks/serializer_read.py [seconds per case]
+"""
+import os
+import sys
+import time
+from datetime import timedelta
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'setup.settings')
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+
+from core_app.models import Insured  # noqa: E402
+from core_app.serializers import InsuredReadSerializer, InsuredSerializer  # noqa: E402
+
+
+def make_insureds(count):
+    now = timezone.now()
+    return [
+        Insured(
+            pk=i, name=f'Insured Número {i}', email=f'insured{i}@example.com', cpf=f'{i:011d}',
+            created_at=now - timedelta(days=i), updated_at=now - timedelta(hours=i),
+        )
+        for i in range(count)
+    ]
+
+
+def as_row(insured):
+    return {field.attname: getattr(insured, field.attname) for field in Insured._meta.concrete_fields}
+
+
+def throughput(fn, seconds):
+    calls = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        fn()
+        calls += 1
+    return calls / elapsed
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    single = make_insureds(1)[0]
+    many = make_insureds(10_000)
+    rows = [as_row(insured) for insured in many]
+
+    expected = InsuredSerializer(many, many=True).data
+    assert InsuredReadSerializer(many, many=True).data == expected
+    assert InsuredReadSerializer(rows, many=True).data == expected
+
+    print(f"{'case':<22} {'Model/s':>12} {'Read/s':>12} {'speedup':>8}")
+    for name, model, read in (
+        ('1 instance', lambda: InsuredSerializer(single).data, lambda: InsuredReadSerializer(single).data),
+        ('10k instances', lambda: InsuredSerializer(many, many=True).data,
+         lambda: InsuredReadSerializer(many, many=True).data),
+        ('10k .values() rows', lambda: InsuredSerializer(many, many=True).data,
+         lambda: InsuredReadSerializer(rows, many=True).data),
+    ):
+        model_rate, read_rate = throughput(model, seconds), throughput(read, seconds)
+        print(f"{name:<22} {model_rate:12,.1f} {read_rate:12,.1f} {read_rate / model_rate:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
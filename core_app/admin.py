@@ -1,10 +1,65 @@
+import re
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from .models import Insured
+from .pagination import EstimatedCountPaginator
+from .revocation import bulk_revoke_insured_tokens
+
+
+class InsuredChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        # Only the columns shown in the list.
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.only(*[name for name in self.list_display if name != 'action_checkbox'])
+
 
 @admin.register(Insured)
 class InsuredAdmin(admin.ModelAdmin):
-    list_display = ["name", "cpf", "email"]
+    """
+    Changelist made for tables of millions of Insureds: no COUNT(*) of the
+    whole table (estimated counts on PostgreSQL, see
+    EstimatedCountPaginator), searches and date drill-downs served by
+    indexes, and only the listed columns read.
+    """
+    list_display = ["name", "cpf", "email", "created_at"]
+    # Matches the insured_created_at_id_idx index, like the date hierarchy.
+    ordering = ['-created_at', '-id']
+    date_hierarchy = 'created_at'
+    search_fields = ['=cpf', '^email']
+    search_help_text = "Exact CPF (masked or not) or beginning of the e-mail."
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    # Insured has no relations to join.
+    list_select_related = False
     exclude = ['password']
+    actions = ['revoke_tokens']
+
+    @admin.action(description="Revoke all tokens (log out everywhere)")
+    def revoke_tokens(self, request, queryset):
+        # Only the pks are read, also when every row of the table is selected.
+        revoked = bulk_revoke_insured_tokens(list(queryset.values_list('pk', flat=True)))
+        self.message_user(request, f"Tokens of {revoked} insured(s) revoked.")
+
+    def get_changelist(self, request, **kwargs):
+        return InsuredChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Looks a term up in the unique indexes only: as a whole CPF when it
+        has 11 digits and nothing but a mask, as the beginning of the
+        lowercased e-mail otherwise (LIKE 'term%', served by the pattern index
+        of the unique email column on PostgreSQL). The default `icontains` search would
+        read the whole table.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        digits = re.sub(r'\D', '', term)
+        if len(digits) == 11 and re.fullmatch(r'[\d.\-\s]+', term):
+            return queryset.filter(cpf=digits), False
+        return queryset.filter(email__startswith=Insured.objects.normalize_email(term)), False
+
     def has_add_permission(self, request):
         return False
 
@@ -13,5 +68,3 @@ class InsuredAdmin(admin.ModelAdmin):
 
     # def has_delete_permission(self, request, obj=None):
     #     return False
-    
-        
@@ -6,4 +6,6 @@ class CoreAppConfig(AppConfig):
     name = 'core_app'
     
     def ready(self):
-        import core_app.spectacular_ext
\ No newline at end of file
+        import core_app.spectacular_ext
+        import core_app.signals
+        import core_app.keyring
\ No newline at end of file
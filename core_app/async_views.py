@@ -0,0 +1,135 @@
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from rest_framework import exceptions, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import views
+from .auth import InsuredJWTAuthentication
+from .hashing import hashing_executor
+from .idempotency import IdempotencyMixin
+from .last_login import last_login_recorder
+from .serializers import (
+    InsuredAsyncLoginSerializer,
+    InsuredAsyncSerializer,
+    InsuredEditSerializer,
+    InsuredReadSerializer,
+)
+
+
+def same_schema_as(method):
+    """
+    Reuses the extend_schema documentation of a sync view method.
+    """
+    def decorator(f):
+        f.kwargs = method.kwargs
+        return f
+    return decorator
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines, awaited on the event loop.
+
+    Authenticators providing an `aauthenticate` coroutine are awaited, the
+    others run in a thread. Content negotiation, permissions and throttling
+    follow APIView.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.aperform_authentication(request)
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, 'aauthenticate'):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+
+class InsuredAsyncLoginView(AsyncAPIView):
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    @same_schema_as(views.InsuredLoginView.post)
+    async def post(self, request):
+        serializer = InsuredAsyncLoginSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = await serializer.aauthenticate()
+        insured = data.pop('insured')
+        await last_login_recorder.arecord(insured.pk)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class InsuredAsyncRegistrationView(IdempotencyMixin, AsyncAPIView):
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    @same_schema_as(views.InsuredRegistrationView.post)
+    async def post(self, request):
+        serializer = InsuredAsyncSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        insured = await serializer.asave()
+        return Response(InsuredReadSerializer(insured).data, status=status.HTTP_200_OK)
+
+
+class InsuredAsyncEditView(views.InsuredEditMixin, AsyncAPIView):
+    authentication_classes = [InsuredJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @same_schema_as(views.InsuredEditView.patch)
+    async def patch(self, request):
+        serializer = InsuredEditSerializer(data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        changes = dict(serializer.validated_data)
+        password = changes.pop('password', None)
+        if password:
+            changes['password'] = await hashing_executor.run(make_password, password)
+        return await sync_to_async(self.edit)(request, changes)
+
+
+class InsuredAsyncMeView(views.InsuredProfileMixin, AsyncAPIView):
+    authentication_classes = [InsuredJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @same_schema_as(views.InsuredMeView.get)
+    async def get(self, request):
+        return self.get_profile(request)
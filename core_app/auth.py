@@ -1,12 +1,97 @@
+from django.core.exceptions import ValidationError
 from rest_framework.authentication import BaseAuthentication, get_authorization_header
 from rest_framework.exceptions import AuthenticationFailed
-from decouple import config
+from .cache import principal_cache
+from .keyring import key_ring
 from .models import Insured
+from .revocation import revocation_list
 import jwt
 
+
+def get_insured(user_id):
+    """
+    Loads the Insured of a verified token, going through the principal cache.
+    """
+    insured = principal_cache.get(user_id)
+    if insured is None:
+        try:
+            insured = Insured.objects.get(pk=user_id)
+        except Insured.DoesNotExist:
+            raise AuthenticationFailed('Insured not found.')
+        principal_cache.set(insured)
+    return insured
+
+
+async def aget_insured(user_id):
+    """
+    get_insured() for async views.
+    """
+    insured = await principal_cache.aget(user_id)
+    if insured is None:
+        try:
+            insured = await Insured.objects.aget(pk=user_id)
+        except Insured.DoesNotExist:
+            raise AuthenticationFailed('Insured not found.')
+        await principal_cache.aset(insured)
+    return insured
+
+
+class LazyInsured:
+    """
+    Stands in for the authenticated Insured of a token, for views that only
+    need its pk. Any other attribute loads the row once and is read from it,
+    so it is never stale.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, pk):
+        self.pk = self.id = pk
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.insured, name)
+
+    @property
+    def insured(self):
+        if '_insured' not in self.__dict__:
+            self.__dict__['_insured'] = get_insured(self.pk)
+        return self.__dict__['_insured']
+
+    def __str__(self):
+        return str(self.insured)
+
+    def __repr__(self):
+        return f'<LazyInsured: {self.pk}>'
+
+
 class InsuredJWTAuthentication(BaseAuthentication):
     keyword = b'Bearer'
     def authenticate(self, request):
+        credentials = self.get_credentials(request)
+        if credentials is None:
+            return None
+        if revocation_list.is_revoked(*credentials):
+            raise AuthenticationFailed('Token revoked.')
+        return (self.get_principal(*credentials), credentials[1])
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for AsyncAPIView, loading the Insured with the async ORM.
+        """
+        credentials = self.get_credentials(request)
+        if credentials is None:
+            return None
+        if await revocation_list.ais_revoked(*credentials):
+            raise AuthenticationFailed('Token revoked.')
+        return (await self.aget_principal(*credentials), credentials[1])
+
+    def get_credentials(self, request):
+        """
+        The id of the Insured and the payload of the access token sent in the
+        Authorization header, or None if there is no Bearer token.
+        """
         parts = get_authorization_header(request).split()
 
         if not parts:
@@ -20,11 +105,8 @@ class InsuredJWTAuthentication(BaseAuthentication):
 
         token = parts[1]
 
-        signing_key = config('JWT_SECRET')
-        algorithms = config('JWT_ALGORITHM')
-
         try:
-            payload = jwt.decode(token, signing_key, algorithms=algorithms)
+            payload = key_ring.decode(token)
         except jwt.ExpiredSignatureError:
             raise AuthenticationFailed('Token expired.')
         except jwt.InvalidTokenError:
@@ -36,10 +118,27 @@ class InsuredJWTAuthentication(BaseAuthentication):
         user_id = payload.get('user_id') or payload.get('sub')
         if not user_id:
             raise AuthenticationFailed('Invalid token payload.')
-
         try:
-            insured = Insured.objects.get(pk=user_id)
-        except Insured.DoesNotExist:
-            raise AuthenticationFailed('Insured not found.')
+            user_id = Insured._meta.pk.to_python(user_id)
+        except ValidationError:
+            raise AuthenticationFailed('Invalid token payload.')
+
+        return user_id, payload
+
+    def get_principal(self, user_id, payload):
+        return get_insured(user_id)
+
+    async def aget_principal(self, user_id, payload):
+        return await aget_insured(user_id)
+
+
+class InsuredLazyJWTAuthentication(InsuredJWTAuthentication):
+    """
+    Authenticates like InsuredJWTAuthentication but defers loading the
+    Insured until the view reads more than its pk, e.g. for the logout.
 
-        return (insured, None)
\ No newline at end of file
+    Async views get the loaded Insured: LazyInsured would query the database
+    from the event loop.
+    """
+    def get_principal(self, user_id, payload):
+        return LazyInsured(user_id)
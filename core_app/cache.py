@@ -0,0 +1,138 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from . import metrics
+
+
+class PrincipalCache:
+    """
+    Caches the Insured resolved by InsuredJWTAuthentication, keyed by its id.
+
+    Entries are kept in an in-process LRU with TTL, or in the Django cache
+    named by INSURED_PRINCIPAL_CACHE['BACKEND'] to share them across workers.
+    They are dropped by the post_save/post_delete signals of Insured.
+    """
+    key_prefix = 'insured-principal:'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.configure()
+
+    def configure(self):
+        options = settings.INSURED_PRINCIPAL_CACHE
+        self.enabled = options['ENABLED']
+        self.max_size = options['MAX_SIZE']
+        self.ttl = options['TTL']
+        self.backend = caches[options['BACKEND']] if options['BACKEND'] else None
+        self.clear()
+
+    def get(self, pk):
+        if not self.enabled:
+            return None
+        key = self.key_prefix + str(pk)
+
+        if self.backend is not None:
+            insured = self.backend.get(key)
+        else:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= time.monotonic():
+                    del self._entries[key]
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                # Views may change the instance, so each caller gets a copy.
+                insured = copy.copy(entry[1]) if entry is not None else None
+
+        with self._lock:
+            if insured is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return insured
+
+    def set(self, insured):
+        if not self.enabled:
+            return
+        key = self.key_prefix + str(insured.pk)
+        # Kept without its password hash, which authentication does not need
+        # and which would be pickled into a shared backend: the field is left
+        # deferred, reading it loads it from the database.
+        insured = copy.copy(insured)
+        insured.__dict__.pop('password', None)
+        insured.__dict__.pop('_password', None)
+
+        if self.backend is not None:
+            self.backend.set(key, insured, self.ttl)
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, insured)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, pk):
+        if not self.enabled:
+            return
+        key = self.key_prefix + str(pk)
+
+        if self.backend is not None:
+            self.backend.delete(key)
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+
+    # The in-process LRU only takes a lock, it is used from the event loop;
+    # a cache backend may do I/O and runs in a thread.
+
+    async def aget(self, pk):
+        if self.backend is None:
+            return self.get(pk)
+        return await sync_to_async(self.get)(pk)
+
+    async def aset(self, insured):
+        if self.backend is None:
+            return self.set(insured)
+        return await sync_to_async(self.set)(insured)
+
+    async def adelete(self, pk):
+        if self.backend is None:
+            return self.delete(pk)
+        return await sync_to_async(self.delete)(pk)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'backend': 'local' if self.backend is None else settings.INSURED_PRINCIPAL_CACHE['BACKEND'],
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+            }
+
+
+principal_cache = PrincipalCache()
+metrics.register('principal_cache', principal_cache.stats)
+
+
+@receiver(setting_changed)
+def reconfigure_principal_cache(setting, **kwargs):
+    if setting in ('INSURED_PRINCIPAL_CACHE', 'CACHES'):
+        principal_cache.configure()
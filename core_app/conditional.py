@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+from django.utils.http import http_date, parse_etags, quote_etag
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def get_version(insured):
+    """
+    The moment the profile of an Insured last changed.
+    """
+    return insured.updated_at or insured.created_at
+
+
+def get_etag(insured):
+    """
+    A strong ETag for the profile of an Insured, "<pk>-<version in µs>",
+    which can be turned back into the version by parse_if_match.
+    """
+    return quote_etag(f'{insured.pk}-{(get_version(insured) - EPOCH) // timedelta(microseconds=1)}')
+
+
+def get_validator_headers(insured):
+    return {
+        'ETag': get_etag(insured),
+        'Last-Modified': http_date(get_version(insured).timestamp()),
+        # Clients may keep the profile, but must revalidate it before use.
+        'Cache-Control': 'private, no-cache',
+    }
+
+
+def parse_if_match(header, insured):
+    """
+    Reads the If-Match header of a request changing `insured`.
+
+    Returns None when any version is accepted (no header or `*`), else the
+    versions the client expects, which are empty when no ETag of the header
+    belongs to this Insured.
+    """
+    if not header:
+        return None
+    etags = parse_etags(header)
+    if '*' in etags:
+        return None
+
+    versions = []
+    prefix = f'"{insured.pk}-'
+    for etag in etags:
+        if etag.startswith(prefix) and etag.endswith('"'):
+            try:
+                versions.append(EPOCH + timedelta(microseconds=int(etag[len(prefix):-1])))
+            except (ValueError, OverflowError):
+                pass
+    return versions
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .models import Insured
+from .representation import compile_representation, get_timezone
+from .serializers import InsuredExportSerializer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def export_records(since=None, chunk_size=2000):
+    """
+    Yields the representation of every Insured (InsuredExportSerializer),
+    in id order, or of those updated at or after `since`.
+
+    Rows are read `chunk_size` at a time as `.values()`, over a server-side
+    cursor on PostgreSQL, so the memory used does not depend on the size of
+    the table.
+    """
+    serializer = InsuredExportSerializer()
+    to_representation = compile_representation(serializer, from_mapping=True)
+    queryset = Insured.objects.order_by('pk')
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    rows = queryset.values(*[field.source for field in serializer._readable_fields])
+
+    tz = get_timezone()
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield to_representation(row, tz)
+
+
+def _encode_ndjson(records):
+    if orjson is not None:
+        return b''.join(orjson.dumps(record) + b'\n' for record in records)
+    return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode()
+
+
+def _encode_csv(records):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(record.values() for record in records)
+    return buffer.getvalue().encode()
+
+
+def _csv_header():
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(InsuredExportSerializer.Meta.fields)
+    return buffer.getvalue().encode()
+
+
+def stream_export(records, file_format, compress=False, batch_size=500):
+    """
+    Encodes `records` as NDJSON or CSV, yielding one bytes chunk per
+    `batch_size` records, gzipped on the fly when `compress`.
+    """
+    encode = _encode_csv if file_format == 'csv' else _encode_ndjson
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    chunks = _encoded_batches(records, encode, batch_size)
+    if file_format == 'csv':
+        chunks = _prepend(_csv_header(), chunks)
+
+    for chunk in chunks:
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+async def astream_export(records, file_format, compress=False, batch_size=500):
+    """
+    stream_export() for ASGI servers, which would otherwise read a sync
+    iterator to the end before sending it. Each chunk is produced in the
+    thread of the request, which holds its database connection and cursor.
+    """
+    chunks = stream_export(records, file_format, compress=compress, batch_size=batch_size)
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+def _encoded_batches(records, encode, batch_size):
+    records = iter(records)
+    while batch := list(islice(records, batch_size)):
+        yield encode(batch)
+
+
+def _prepend(first, chunks):
+    yield first
+    yield from chunks
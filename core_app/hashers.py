@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class InsuredPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2PasswordHasher hashing with INSURED_PASSWORD_HASHING
+    ['PBKDF2_ITERATIONS'], as recommended by `manage.py calibrate_hasher`.
+
+    It keeps the pbkdf2_sha256 algorithm name, so it verifies the hashes of
+    PBKDF2PasswordHasher, and must_update() flags those stored with another
+    iteration count.
+    """
+    @property
+    def iterations(self):
+        return settings.INSURED_PASSWORD_HASHING['PBKDF2_ITERATIONS']
@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import metrics
+
+
+class HashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins and registrations in progress, try again later.'
+    default_code = 'hashing_unavailable'
+
+    def __init__(self, wait):
+        # Sent as Retry-After by the DRF exception handler.
+        self.wait = wait
+        super().__init__()
+
+
+class HashingLimiter:
+    """
+    Caps the password hashing operations running at once in this process to
+    INSURED_HASHING['MAX_CONCURRENCY'], so that hashing can not take every
+    core from the rest of the API.
+
+    Callers wait up to INSURED_HASHING['QUEUE_TIMEOUT'] seconds for a slot,
+    then HashingUnavailable is raised (503 with Retry-After).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(self):
+        options = settings.INSURED_HASHING
+        self.max_concurrency = options['MAX_CONCURRENCY']
+        self.queue_timeout = options['QUEUE_TIMEOUT']
+        self.retry_after = options['RETRY_AFTER']
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self.waiting = 0
+        self.active = 0
+        self.admitted = 0
+        self.shed = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+
+    def acquire(self, since=None, deadline=True):
+        """
+        Waits for a slot and returns the function releasing it. The deadline
+        counts from `since` (a time.monotonic() value) when the caller already
+        queued elsewhere; without `deadline`, waits as long as it takes, for
+        the rest of a batch that was already admitted.
+        """
+        now = time.monotonic()
+        since = now if since is None else since
+        semaphore = self._semaphore
+        with self._lock:
+            self.waiting += 1
+        timeout = max(0, self.queue_timeout - (now - since)) if deadline else None
+        acquired = semaphore.acquire(timeout=timeout)
+        queue_time = time.monotonic() - since
+        with self._lock:
+            self.waiting -= 1
+            self.queue_time_total += queue_time
+            self.queue_time_max = max(self.queue_time_max, queue_time)
+            if acquired:
+                self.admitted += 1
+                self.active += 1
+            else:
+                self.shed += 1
+        if not acquired:
+            raise HashingUnavailable(self.retry_after)
+        return self._releaser(semaphore)
+
+    def try_acquire(self, timeout=0):
+        """
+        Waits up to `timeout` seconds for a slot, for background work that
+        can be skipped: returns the function releasing it, or None. Not
+        counted in the admissions, the queue time or the shed requests.
+        """
+        semaphore = self._semaphore
+        if not semaphore.acquire(timeout=timeout):
+            return None
+        with self._lock:
+            self.active += 1
+        return self._releaser(semaphore)
+
+    def _releaser(self, semaphore):
+        def release():
+            with self._lock:
+                self.active -= 1
+            semaphore.release()
+        return release
+
+    @contextmanager
+    def slot(self, since=None, deadline=True):
+        release = self.acquire(since, deadline)
+        try:
+            yield
+        finally:
+            release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'waiting': self.waiting,
+                'active': self.active,
+                'admitted': self.admitted,
+                'shed': self.shed,
+                'queue_time_seconds_total': self.queue_time_total,
+                'queue_time_seconds_max': self.queue_time_max,
+            }
+
+
+class HashingConcurrencyLimitMixin:
+    """
+    APIView mixin holding a hashing_limiter slot while the handlers of
+    `hashing_limited_methods` run. The slot is taken after authentication
+    and permissions, and released once the response is finalized.
+    """
+    hashing_limited_methods = ('post',)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method.lower() in self.hashing_limited_methods:
+            self._release_hashing_slot = hashing_limiter.acquire()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        release = getattr(self, '_release_hashing_slot', None)
+        if release is not None:
+            self._release_hashing_slot = None
+            release()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class HashingExecutor:
+    """
+    Runs password hashing and verification for async views on a bounded
+    pool, so the event loop keeps serving I/O-bound requests meanwhile, and
+    the hashing of batches spread over the pool.
+
+    A thread pool is enough: hashlib releases the GIL while it computes
+    PBKDF2, and the other Django hashers (bcrypt, argon2, scrypt) do as well.
+    Submissions beyond INSURED_HASHING['MAX_WORKERS'] wait in the queue, and
+    each task also takes a hashing_limiter slot, shared with the sync views:
+    tasks that queued past the deadline fail with HashingUnavailable.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.configure()
+
+    def configure(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.max_workers = settings.INSURED_HASHING['MAX_WORKERS']
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hashing')
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+
+    async def run(self, fn, *args):
+        """
+        Awaits fn(*args) computed on the pool.
+        """
+        return await asyncio.wrap_future(self._submit(fn, args, since=time.monotonic()))
+
+    def map(self, fn, iterable):
+        """
+        Returns [fn(item) for item in iterable] computed on the pool, for
+        sync views hashing a batch, each item taking its own hashing_limiter
+        slot. At most as many items as there are slots (and threads) are
+        submitted at once, so the batch queues fairly with the async views.
+
+        The first item admits the batch: it raises HashingUnavailable when
+        no slot frees up within QUEUE_TIMEOUT, before anything is hashed.
+        The other items then wait for their slot without a deadline, so a
+        batch is not shed halfway through.
+        """
+        results = []
+        window = deque()
+        size = min(self.max_workers, hashing_limiter.max_concurrency)
+        admitted = time.monotonic()
+        try:
+            for index, item in enumerate(iterable):
+                if len(window) >= size:
+                    results.append(window.popleft().result())
+                first = index == 0
+                window.append(self._submit(fn, (item,), since=admitted if first else None, deadline=first))
+            while window:
+                results.append(window.popleft().result())
+        finally:
+            for future in window:
+                future.cancel()
+        return results
+
+    def _submit(self, fn, args, since, deadline=True):
+        """
+        Submits fn(*args), which waits for a slot with a deadline counting
+        from `since`, or without one.
+        """
+        def task():
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                with hashing_limiter.slot(since=since, deadline=deadline):
+                    return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        def dequeue_cancelled(future):
+            # A cancelled future never reaches task().
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+
+        with self._lock:
+            self.queued += 1
+        future = self._executor.submit(task)
+        future.add_done_callback(dequeue_cancelled)
+        return future
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'queued': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+            }
+
+
+hashing_limiter = HashingLimiter()
+hashing_executor = HashingExecutor()
+metrics.register('hashing', hashing_executor.stats)
+metrics.register('hashing_limiter', hashing_limiter.stats)
+
+
+@receiver(setting_changed)
+def reconfigure_hashing(setting, **kwargs):
+    if setting == 'INSURED_HASHING':
+        hashing_limiter.configure()
+        hashing_executor.configure()
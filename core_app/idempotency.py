@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, JsonResponse
+
+from . import metrics
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyStore:
+    """
+    Keeps the responses of requests sent with an Idempotency-Key, so that
+    retries are answered with the first response instead of running again.
+
+    A key is claimed by the first request, and holds its response once it
+    is finished, for INSURED_IDEMPOTENCY['TTL'] seconds. Entries are kept in
+    an in-process LRU of MAX_SIZE keys, or in the Django cache named by
+    BACKEND to share them across workers (e.g. a DatabaseCache). A claim
+    left by a request that never finished expires after LOCK_TIMEOUT.
+    """
+    key_prefix = 'insured-idempotency:'
+    poll_interval = 0.05
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._entries = OrderedDict()
+        self.configure()
+
+    def configure(self):
+        options = settings.INSURED_IDEMPOTENCY
+        self.enabled = options['ENABLED']
+        self.ttl = options['TTL']
+        self.max_size = options['MAX_SIZE']
+        self.wait_timeout = options['WAIT_TIMEOUT']
+        self.lock_timeout = options['LOCK_TIMEOUT']
+        self.backend = caches[options['BACKEND']] if options['BACKEND'] else None
+        self.clear()
+
+    def begin(self, key, fingerprint):
+        """
+        Claims `key` for a request whose body hashes to `fingerprint`,
+        returning None, or returns the entry of the request that claimed it
+        first: {'fingerprint': ..., 'response': None while in flight}.
+        """
+        claim = {'fingerprint': fingerprint, 'response': None}
+        key = self.key_prefix + key
+
+        if self.backend is not None:
+            # add() is atomic, only one of concurrent requests gets the key.
+            for _ in range(2):
+                if self.backend.add(key, claim, self.lock_timeout):
+                    return None
+                entry = self.backend.get(key)
+                if entry is not None:
+                    return entry
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[1]
+            self._entries[key] = (time.monotonic() + self.lock_timeout, claim)
+            self._evict()
+            return None
+
+    def claim(self, key, fingerprint):
+        """
+        begin(), waiting up to WAIT_TIMEOUT seconds for a request holding
+        `key` to finish. The returned entry is still in flight if it did not.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            entry = self.begin(key, fingerprint)
+            remaining = deadline - time.monotonic()
+            if entry is None or entry['response'] is not None or entry['fingerprint'] != fingerprint or remaining <= 0:
+                self._count(entry, fingerprint)
+                return entry
+            if self.backend is not None:
+                time.sleep(min(remaining, self.poll_interval))
+            else:
+                with self._changed:
+                    self._changed.wait(min(remaining, self.poll_interval))
+
+    async def aclaim(self, key, fingerprint):
+        """
+        claim() for async views, waiting on the event loop.
+        """
+        begin = self.begin if self.backend is None else sync_to_async(self.begin)
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            entry = begin(key, fingerprint)
+            if self.backend is not None:
+                entry = await entry
+            remaining = deadline - time.monotonic()
+            if entry is None or entry['response'] is not None or entry['fingerprint'] != fingerprint or remaining <= 0:
+                self._count(entry, fingerprint)
+                return entry
+            await asyncio.sleep(min(remaining, self.poll_interval))
+
+    def complete(self, key, fingerprint, response):
+        """
+        Stores the (status, content type, content) of the request holding `key`.
+        """
+        entry = {'fingerprint': fingerprint, 'response': response}
+        key = self.key_prefix + key
+
+        if self.backend is not None:
+            self.backend.set(key, entry, self.ttl)
+            return
+        with self._changed:
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            self._evict()
+            self._changed.notify_all()
+
+    def release(self, key):
+        """
+        Gives `key` up without a response, so a retry runs again.
+        """
+        key = self.key_prefix + key
+
+        if self.backend is not None:
+            self.backend.delete(key)
+            return
+        with self._changed:
+            self._entries.pop(key, None)
+            self._changed.notify_all()
+
+    # The in-process LRU only takes a lock, it is used from the event loop;
+    # a cache backend may do I/O (e.g. a DatabaseCache) and runs in a thread.
+
+    async def acomplete(self, key, fingerprint, response):
+        if self.backend is None:
+            return self.complete(key, fingerprint, response)
+        return await sync_to_async(self.complete)(key, fingerprint, response)
+
+    async def arelease(self, key):
+        if self.backend is None:
+            return self.release(key)
+        return await sync_to_async(self.release)(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.claimed = 0
+            self.replayed = 0
+            self.in_flight = 0
+            self.mismatched = 0
+
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _count(self, entry, fingerprint):
+        with self._lock:
+            if entry is None:
+                self.claimed += 1
+            elif entry['fingerprint'] != fingerprint:
+                self.mismatched += 1
+            elif entry['response'] is None:
+                self.in_flight += 1
+            else:
+                self.replayed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'backend': 'local' if self.backend is None else settings.INSURED_IDEMPOTENCY['BACKEND'],
+                'claimed': self.claimed,
+                'replayed': self.replayed,
+                'in_flight': self.in_flight,
+                'mismatched': self.mismatched,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+            }
+
+
+idempotency_store = IdempotencyStore()
+metrics.register('idempotency', idempotency_store.stats)
+
+
+@receiver(setting_changed)
+def reconfigure_idempotency_store(setting, **kwargs):
+    if setting in ('INSURED_IDEMPOTENCY', 'CACHES'):
+        idempotency_store.configure()
+
+
+class IdempotencyMixin:
+    """
+    APIView mixin answering retries of `idempotent_methods` sent with the
+    same Idempotency-Key header with the first response, without running
+    the view again. A duplicate arriving while the first request is still
+    running waits for it (INSURED_IDEMPOTENCY['WAIT_TIMEOUT']).
+
+    Keys are scoped by path and Authorization header, and tied to the body
+    they were first sent with. 5xx responses are not kept, so that they can
+    be retried. Listed first in the bases, so a replay does not take a
+    hashing slot.
+    """
+    idempotent_methods = ('post',)
+
+    def dispatch(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key or request.method.lower() not in self.idempotent_methods or not idempotency_store.enabled:
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            # Every response of an async view has to be awaitable.
+            return self._adispatch_idempotent(key, request, *args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return self.invalid_key_response()
+
+        scope, fingerprint = self.get_scope(request, key)
+        entry = idempotency_store.claim(scope, fingerprint)
+        if entry is not None:
+            return self.replay_response(entry, fingerprint)
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except BaseException:
+            idempotency_store.release(scope)
+            raise
+        kept = self.get_kept_response(response)
+        if kept is None:
+            idempotency_store.release(scope)
+        else:
+            idempotency_store.complete(scope, fingerprint, kept)
+        return response
+
+    async def _adispatch_idempotent(self, key, request, *args, **kwargs):
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return self.invalid_key_response()
+
+        scope, fingerprint = self.get_scope(request, key)
+        entry = await idempotency_store.aclaim(scope, fingerprint)
+        if entry is not None:
+            return self.replay_response(entry, fingerprint)
+        try:
+            response = await super().dispatch(request, *args, **kwargs)
+        except BaseException:
+            await idempotency_store.arelease(scope)
+            raise
+        kept = self.get_kept_response(response)
+        if kept is None:
+            await idempotency_store.arelease(scope)
+        else:
+            await idempotency_store.acomplete(scope, fingerprint, kept)
+        return response
+
+    def get_scope(self, request, key):
+        """
+        Returns the (scope, fingerprint) the store keeps the response under.
+        """
+        scope = hashlib.sha256('\n'.join((
+            request.path, request.headers.get('Authorization', ''), key,
+        )).encode()).hexdigest()
+        return scope, hashlib.sha256(request.body).hexdigest()
+
+    def get_kept_response(self, response):
+        """
+        Returns the (status, content type, content) to replay, or None for
+        responses that are not kept.
+        """
+        if response.status_code >= 500:
+            return None
+        if hasattr(response, 'render'):
+            response.render()
+        return response.status_code, response['Content-Type'], response.content
+
+    def invalid_key_response(self):
+        return JsonResponse(
+            {'detail': f'Idempotency-Key must have at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters.'},
+            status=400,
+        )
+
+    def replay_response(self, entry, fingerprint):
+        if entry['fingerprint'] != fingerprint:
+            return JsonResponse(
+                {'detail': 'This Idempotency-Key was already used with a different request body.'},
+                status=422,
+            )
+        if entry['response'] is None:
+            response = JsonResponse(
+                {'detail': 'A request with this Idempotency-Key is still in progress, retry later.'},
+                status=409,
+            )
+            response['Retry-After'] = '1'
+            return response
+        status_code, content_type, content = entry['response']
+        response = HttpResponse(content, status=status_code, content_type=content_type)
+        response['Idempotent-Replayed'] = 'true'
+        return response
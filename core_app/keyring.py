@@ -0,0 +1,158 @@
+import json
+
+import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError, TokenBackendExpiredToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+class SigningKey:
+    """
+    A key of the ring, with its key material parsed once for its algorithm.
+    Keys without a signing key can only verify, like a retired key whose
+    tokens are still valid.
+    """
+    def __init__(self, kid, algorithm, signing_key=None, verifying_key=None):
+        try:
+            jws_algorithm = jwt.PyJWS().get_algorithm_by_name(algorithm)
+        except NotImplementedError:
+            raise ImproperlyConfigured(
+                f"JWT key '{kid}' uses the algorithm {algorithm}, which is unknown "
+                "or needs the cryptography package."
+            )
+        self.kid = kid
+        self.algorithm = algorithm
+        self.signing_key = jws_algorithm.prepare_key(signing_key) if signing_key else None
+        if algorithm.startswith('HS'):
+            self.verifying_key = self.signing_key
+        elif verifying_key:
+            self.verifying_key = jws_algorithm.prepare_key(verifying_key)
+        else:
+            self.verifying_key = self.signing_key.public_key() if self.signing_key else None
+        if self.verifying_key is None:
+            raise ImproperlyConfigured(f"JWT key '{kid}' has no key to verify tokens.")
+
+
+class KeyRing:
+    """
+    The keys used to sign and verify the tokens of Insureds, loaded once from
+    JWT_KEY_RING.
+
+    Tokens are signed with the active key and carry its id in the `kid`
+    header, verification picks the key by that header. Tokens without a
+    `kid` are verified with the first key of the ring.
+    """
+    def __init__(self):
+        self.configure()
+
+    def configure(self):
+        options = settings.JWT_KEY_RING
+        keys = list(options['KEYS'])
+        if options['KEYS_FILE']:
+            with open(options['KEYS_FILE'], encoding='utf-8') as f:
+                keys += json.load(f)
+
+        self.keys = {}
+        for key in keys:
+            signing_key = SigningKey(
+                key['kid'], key['algorithm'], key.get('signing_key'), key.get('verifying_key'),
+            )
+            self.keys[signing_key.kid] = signing_key
+        if not self.keys:
+            raise ImproperlyConfigured("JWT_KEY_RING has no keys.")
+        self.default_key = self.keys[keys[0]['kid']]
+
+        active_kid = options['ACTIVE_KID'] or self.default_key.kid
+        if active_kid not in self.keys or self.keys[active_kid].signing_key is None:
+            raise ImproperlyConfigured(f"The active JWT key '{active_kid}' can not sign tokens.")
+        self.active_key = self.keys[active_kid]
+        # Every token signed with a key shares the same encoded header, so
+        # the key of each header is resolved once. Only headers of tokens
+        # whose signature verified are kept: the ones the ring signed.
+        self._header_keys = {}
+
+    def encode(self, payload, json_encoder=None):
+        key = self.active_key
+        return jwt.encode(
+            payload, key.signing_key, algorithm=key.algorithm,
+            headers={'kid': key.kid}, json_encoder=json_encoder,
+        )
+
+    def decode(self, token, **kwargs):
+        """
+        Verifies the token with the key named by its `kid` header. Raises the
+        PyJWT errors, like jwt.decode.
+        """
+        if isinstance(token, bytes):
+            token = token.decode('utf-8', 'replace')
+        header = token.split('.', 1)[0]
+        key = self._header_keys.get(header)
+        if key is not None:
+            return jwt.decode(token, key.verifying_key, algorithms=[key.algorithm], **kwargs)
+
+        kid = jwt.get_unverified_header(token).get('kid')
+        if kid is None:
+            key = self.default_key
+        else:
+            key = self.keys.get(kid)
+            if key is None:
+                raise jwt.InvalidTokenError(f"Unknown key id {kid}.")
+        payload = jwt.decode(token, key.verifying_key, algorithms=[key.algorithm], **kwargs)
+        verified = kwargs.get('options', {}).get('verify_signature', True)
+        if verified and len(self._header_keys) < 64:
+            self._header_keys[header] = key
+        return payload
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    simplejwt token backend that signs and verifies with the key ring.
+    """
+    def __init__(self, key_ring):
+        super().__init__(
+            api_settings.ALGORITHM,
+            audience=api_settings.AUDIENCE,
+            issuer=api_settings.ISSUER,
+            leeway=api_settings.LEEWAY,
+            json_encoder=api_settings.JSON_ENCODER,
+        )
+        self.key_ring = key_ring
+
+    def encode(self, payload):
+        payload = payload.copy()
+        if self.audience is not None:
+            payload['aud'] = self.audience
+        if self.issuer is not None:
+            payload['iss'] = self.issuer
+        return self.key_ring.encode(payload, json_encoder=self.json_encoder)
+
+    def decode(self, token, verify=True):
+        try:
+            return self.key_ring.decode(
+                token,
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    'verify_aud': self.audience is not None,
+                    'verify_signature': verify,
+                },
+            )
+        except jwt.ExpiredSignatureError as e:
+            raise TokenBackendExpiredToken('Token is expired') from e
+        except jwt.InvalidTokenError as e:
+            raise TokenBackendError('Token is invalid') from e
+
+
+key_ring = KeyRing()
+token_backend = KeyRingTokenBackend(key_ring)
+
+
+@receiver(setting_changed)
+def reconfigure_key_ring(setting, **kwargs):
+    if setting == 'JWT_KEY_RING':
+        key_ring.configure()
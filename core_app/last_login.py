@@ -0,0 +1,142 @@
+import atexit
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, connections
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from . import metrics
+from .models import Insured
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginRecorder:
+    """
+    Collects the last_login of Insureds in memory and writes them in bulk,
+    instead of one UPDATE per login.
+
+    Timestamps are kept per Insured (the latest wins) and flushed every
+    INSURED_LAST_LOGIN['FLUSH_INTERVAL'] seconds by a background thread,
+    when MAX_PENDING Insureds are waiting, and when the process exits.
+    With SYNC, each login is written right away, as tests expect.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+        self.flushes = 0
+        self.written = 0
+        self.configure()
+
+    def configure(self):
+        options = settings.INSURED_LAST_LOGIN
+        self.sync = options['SYNC']
+        self.flush_interval = options['FLUSH_INTERVAL']
+        self.max_pending = options['MAX_PENDING']
+
+    def record(self, pk, when=None):
+        when = when or now()
+        if self.sync:
+            Insured.objects.filter(pk=pk).update(last_login=when)
+            return
+
+        if self._add(pk, when) >= self.max_pending:
+            self.flush()
+
+    async def arecord(self, pk, when=None):
+        when = when or now()
+        if self.sync:
+            await Insured.objects.filter(pk=pk).aupdate(last_login=when)
+            return
+
+        if self._add(pk, when) >= self.max_pending:
+            # The ORM can not write from the event loop.
+            await sync_to_async(self.flush)()
+
+    def _add(self, pk, when):
+        """
+        Queues the login of `pk`, returning how many Insureds are pending.
+        """
+        with self._lock:
+            self._merge({pk: when})
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='last-login-flusher', daemon=True)
+                self._thread.start()
+            return len(self._pending)
+
+    def flush(self):
+        """
+        Writes the pending timestamps, returning how many Insureds were updated.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            self._write(pending)
+        except Exception:
+            logger.exception("Could not write the last_login of %d insureds, keeping them for the next flush.", len(pending))
+            with self._lock:
+                self._merge(pending)
+            return 0
+
+        with self._lock:
+            self.flushes += 1
+            self.written += len(pending)
+        return len(pending)
+
+    def _merge(self, pending):
+        for pk, when in pending.items():
+            current = self._pending.get(pk)
+            if current is None or when > current:
+                self._pending[pk] = when
+
+    def _write(self, pending):
+        if connection.vendor == 'postgresql':
+            table = connection.ops.quote_name(Insured._meta.db_table)
+            values = ', '.join(['(%s, %s::timestamptz)'] * len(pending))
+            params = [value for item in pending.items() for value in item]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} AS i SET last_login = GREATEST(i.last_login, v.last_login) "
+                    f"FROM (VALUES {values}) AS v(id, last_login) WHERE i.id = v.id",
+                    params,
+                )
+        else:
+            Insured.objects.bulk_update(
+                [Insured(pk=pk, last_login=when) for pk, when in pending.items()],
+                ['last_login'],
+            )
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+            # The connection of this thread is not managed by a request.
+            connections.close_all()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'flushes': self.flushes,
+                'written': self.written,
+            }
+
+
+last_login_recorder = LastLoginRecorder()
+metrics.register('last_login', last_login_recorder.stats)
+atexit.register(last_login_recorder.flush)
+
+
+@receiver(setting_changed)
+def reconfigure_last_login_recorder(setting, **kwargs):
+    if setting == 'INSURED_LAST_LOGIN':
+        last_login_recorder.configure()
@@ -0,0 +1,137 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+from core_app.hashers import InsuredPBKDF2PasswordHasher
+
+# OWASP Password Storage Cheat Sheet, PBKDF2-HMAC-SHA256.
+OWASP_MIN_PBKDF2_ITERATIONS = 600_000
+DEFAULT_ITERATIONS = [
+    100_000, 200_000, 300_000, 400_000, 600_000, 800_000, 1_000_000, 1_200_000, 1_500_000, 2_000_000, 3_000_000,
+]
+PASSWORD = 'calibration-Pa55word'
+
+
+def measure(hash_password, concurrency, samples):
+    """
+    Latencies in seconds of `samples` calls of `hash_password` on each of
+    `concurrency` threads running at once, as during a login storm.
+    """
+    def run(_):
+        latencies = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            hash_password()
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        latencies = sorted(latency for thread in executor.map(run, range(concurrency)) for latency in thread)
+        elapsed = time.perf_counter() - started
+    return latencies, len(latencies) / elapsed
+
+
+def percentile(latencies, fraction):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the password hashers on this machine, with as many hashes at once as "
+        "INSURED_HASHING['MAX_CONCURRENCY'] lets logins run, and recommends the PBKDF2 "
+        "iterations (INSURED_PBKDF2_ITERATIONS) whose p99 fits the given budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=float, default=250.0,
+                            help="p99 of one hash, in milliseconds, not to exceed. Defaults to 250.")
+        parser.add_argument('--concurrency', type=int, default=settings.INSURED_HASHING['MAX_CONCURRENCY'],
+                            help="Hashes running at once. Defaults to INSURED_HASHING['MAX_CONCURRENCY'].")
+        parser.add_argument('--samples', type=int, default=10, help="Hashes per thread and candidate.")
+        parser.add_argument('--iterations', type=int, nargs='+', default=DEFAULT_ITERATIONS,
+                            help="PBKDF2 iteration counts to try.")
+
+    def handle(self, *args, **options):
+        budget = options['budget'] / 1000
+        concurrency = options['concurrency']
+        samples = options['samples']
+        if budget <= 0 or concurrency < 1 or samples < 1:
+            raise CommandError("--budget, --concurrency and --samples must be positive.")
+
+        self.stdout.write(
+            f"{concurrency} hashes at once, {samples * concurrency} per candidate, "
+            f"p99 budget {budget * 1000:.0f} ms\n"
+        )
+        self.stdout.write(f"{'hasher':28} {'parameters':22} {'p50 ms':>9} {'p99 ms':>9} {'hashes/s':>9}")
+
+        hasher = PBKDF2PasswordHasher()
+        salt = hasher.salt()
+        recommended = None
+        for iterations in sorted(options['iterations']):
+            latencies, throughput = measure(
+                lambda: hasher.encode(PASSWORD, salt, iterations=iterations), concurrency, samples,
+            )
+            p99 = percentile(latencies, 0.99)
+            self._row('pbkdf2_sha256', f'iterations={iterations}', latencies, throughput)
+            if p99 > budget:
+                break
+            recommended = (iterations, p99, throughput)
+
+        self._others(concurrency, samples)
+        self._recommend(recommended, budget)
+
+    def _others(self, concurrency, samples):
+        """
+        The other hashers of PASSWORD_HASHERS, at their own parameters, for
+        comparison.
+        """
+        for hasher in get_hashers():
+            if isinstance(hasher, InsuredPBKDF2PasswordHasher) or hasher.algorithm == 'pbkdf2_sha256':
+                continue
+            library = getattr(hasher, 'library', None)
+            if library:
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    self.stdout.write(f"{hasher.algorithm:28} not installed")
+                    continue
+            salt = hasher.salt()
+            latencies, throughput = measure(lambda: hasher.encode(PASSWORD, salt), concurrency, samples)
+            self._row(hasher.algorithm, 'defaults', latencies, throughput)
+
+    def _row(self, algorithm, parameters, latencies, throughput):
+        self.stdout.write(
+            f"{algorithm:28} {parameters:22} {statistics.median(latencies) * 1000:9.1f} "
+            f"{percentile(latencies, 0.99) * 1000:9.1f} {throughput:9.1f}"
+        )
+
+    def _recommend(self, recommended, budget):
+        current = settings.INSURED_PASSWORD_HASHING['PBKDF2_ITERATIONS']
+        self.stdout.write('')
+        if recommended is None:
+            self.stdout.write(self.style.ERROR(
+                f"No PBKDF2 iteration count tried fits a p99 of {budget * 1000:.0f} ms: "
+                "raise the budget, lower the concurrency or add cores."
+            ))
+            return
+
+        iterations, p99, throughput = recommended
+        self.stdout.write(self.style.SUCCESS(
+            f"INSURED_PBKDF2_ITERATIONS={iterations} "
+            f"(p99 {p99 * 1000:.0f} ms, {throughput:.0f} logins/s per process; currently {current})"
+        ))
+        if iterations < OWASP_MIN_PBKDF2_ITERATIONS:
+            self.stdout.write(self.style.WARNING(
+                f"Below the {OWASP_MIN_PBKDF2_ITERATIONS} iterations recommended by OWASP: "
+                "prefer more cores or a larger budget."
+            ))
+        if iterations != current:
+            self.stdout.write(
+                "Stored hashes are upgraded to it in the background after each successful login "
+                "(INSURED_PASSWORD_UPGRADE)."
+            )
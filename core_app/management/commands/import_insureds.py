@@ -0,0 +1,234 @@
+import csv
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core_app.models import Insured
+from core_app.validators import CPF_ERROR_MESSAGES, validate_cpf_batch
+
+NAME_MAX_LENGTH = Insured._meta.get_field('name').max_length
+
+
+def _init_worker():
+    # Workers started with the "spawn" method need the app registry as well.
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports insureds from a CSV or NDJSON file. Rows are streamed in chunks, "
+        "loaded through COPY into a staging table and upserted by e-mail on "
+        "PostgreSQL, or through bulk_create on other databases. Rejected rows are "
+        "written to a sidecar NDJSON file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (with header) or NDJSON file with name, email, cpf and password.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help="Processes hashing passwords. Use 0 to hash in the current process.")
+        parser.add_argument('--rejected', help="Sidecar file for rejected rows. Defaults to <path>.rejected.ndjson.")
+        parser.add_argument('--prehashed', action='store_true',
+                            help="Passwords are already Django password hashes and are stored as they are.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+        file_format = options['format'] or self._guess_format(path)
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive.")
+        rejected_path = options['rejected'] or f'{path}.rejected.ndjson'
+        self.prehashed = options['prehashed']
+
+        self.workers = options['workers']
+        pool = None
+        if self.workers and not self.prehashed:
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+        processed = imported = rejected = 0
+        started = time.monotonic()
+        try:
+            with open(path, newline='', encoding='utf-8') as source, \
+                    open(rejected_path, 'w', encoding='utf-8') as sidecar:
+                records = self._read(source, file_format)
+                while True:
+                    chunk = list(islice(records, chunk_size))
+                    if not chunk:
+                        break
+                    rows, rejections = self._clean_chunk(chunk)
+                    if rows:
+                        self._hash_passwords(rows, pool)
+                        self._load(rows)
+                    for rejection in rejections:
+                        sidecar.write(json.dumps(rejection, ensure_ascii=False) + '\n')
+
+                    processed += len(chunk)
+                    imported += len(rows)
+                    rejected += len(rejections)
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(
+                        f"{processed} rows processed, {imported} imported, {rejected} rejected "
+                        f"({processed / elapsed:.0f} rows/s)"
+                    )
+        finally:
+            if pool:
+                pool.shutdown()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} of {processed} rows in {elapsed:.1f}s."
+        ))
+        if rejected:
+            self.stdout.write(self.style.WARNING(f"{rejected} rejected rows written to {rejected_path}"))
+
+    def _guess_format(self, path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return 'csv'
+        if extension in ('.ndjson', '.jsonl'):
+            return 'ndjson'
+        raise CommandError("Could not guess the file format, use --format.")
+
+    def _read(self, source, file_format):
+        """
+        Yields (line, row) pairs, row being None when the line can not be parsed.
+        """
+        if file_format == 'csv':
+            for line, row in enumerate(csv.DictReader(source), start=2):
+                yield line, row
+            return
+        for line, raw in enumerate(source, start=1):
+            if not raw.strip():
+                continue
+            try:
+                row = json.loads(raw)
+            except ValueError:
+                row = None
+            yield line, row
+
+    def _clean_chunk(self, chunk):
+        rows = []
+        rejections = []
+        seen = {'email': set(), 'cpf': set()}
+        cpfs = [str(record.get('cpf') or '') if isinstance(record, dict) else '' for _, record in chunk]
+        _, cpf_reasons = validate_cpf_batch(cpfs)
+        for (line, record), cpf_reason in zip(chunk, cpf_reasons):
+            row, errors = self._clean(record, cpf_reason)
+            for field in ('email', 'cpf'):
+                if not errors and row[field] in seen[field]:
+                    errors[field] = ['Duplicated in this file.']
+            if errors:
+                rejections.append(self._rejection(line, record, errors))
+                continue
+            seen['email'].add(row['email'])
+            seen['cpf'].add(row['cpf'])
+            rows.append((line, record, row))
+
+        # A CPF may only move along with its e-mail, upserting it under another
+        # e-mail would violate the unique constraint on cpf.
+        owners = dict(Insured.objects.filter(
+            cpf__in=[row['cpf'] for _, _, row in rows]
+        ).values_list('cpf', 'email'))
+        valid = []
+        for line, record, row in rows:
+            owner = owners.get(row['cpf'])
+            if owner is not None and owner != row['email']:
+                rejections.append(self._rejection(line, record, {'cpf': ['CPF already registered to another e-mail.']}))
+            else:
+                valid.append(row)
+        return valid, rejections
+
+    def _clean(self, record, cpf_reason):
+        if not isinstance(record, dict):
+            return None, {'non_field_errors': ['Could not parse the row.']}
+
+        errors = {}
+        name = (record.get('name') or '').strip()
+        if not name:
+            errors['name'] = ['This field is required.']
+        elif len(name) > NAME_MAX_LENGTH:
+            errors['name'] = [f'Ensure this field has no more than {NAME_MAX_LENGTH} characters.']
+
+        email = Insured.objects.normalize_email((record.get('email') or '').strip())
+        try:
+            validate_email(email)
+        except ValidationError as e:
+            errors['email'] = e.messages
+
+        cpf = re.sub(r'\D', '', str(record.get('cpf') or ''))
+        if cpf_reason:
+            errors['cpf'] = [str(CPF_ERROR_MESSAGES[cpf_reason])]
+
+        return {'name': name, 'email': email, 'cpf': cpf, 'password': record.get('password') or None}, errors
+
+    def _rejection(self, line, record, errors):
+        if isinstance(record, dict):
+            record = {key: value for key, value in record.items() if key != 'password'}
+        return {'line': line, 'row': record, 'errors': errors}
+
+    def _hash_passwords(self, rows, pool):
+        if self.prehashed:
+            for row in rows:
+                row['password'] = row['password'] or make_password(None)
+            return
+        passwords = [row['password'] for row in rows]
+        if pool:
+            hashes = pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (self.workers * 4)))
+        else:
+            hashes = map(make_password, passwords)
+        for row, encoded in zip(rows, hashes):
+            row['password'] = encoded
+
+    def _load(self, rows):
+        if connection.vendor == 'postgresql':
+            self._copy_upsert(rows)
+        else:
+            Insured.objects.bulk_create(
+                [Insured(**row) for row in rows],
+                update_conflicts=True,
+                unique_fields=['email'],
+                update_fields=['name', 'cpf', 'password', 'updated_at'],
+            )
+
+    def _copy_upsert(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row['name'], row['email'], row['cpf'], row['password']])
+        buffer.seek(0)
+
+        table = connection.ops.quote_name(Insured._meta.db_table)
+        now = timezone.now()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS insured_import ("
+                "name varchar(50), email varchar(254), cpf varchar(11), password varchar(128)"
+                ") ON COMMIT DELETE ROWS"
+            )
+            cursor.copy_expert(
+                "COPY insured_import (name, email, cpf, password) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                f"INSERT INTO {table} (name, email, cpf, password, created_at, updated_at) "
+                "SELECT name, email, cpf, password, %s, %s FROM insured_import "
+                "ON CONFLICT (email) DO UPDATE SET "
+                "name = EXCLUDED.name, cpf = EXCLUDED.cpf, "
+                "password = EXCLUDED.password, updated_at = EXCLUDED.updated_at",
+                [now, now],
+            )
@@ -0,0 +1,15 @@
+"""
+Process-wide registry of the counters exposed by MetricsView.
+
+Components register a callable returning a dict of their current values,
+which is collected on every scrape.
+"""
+_collectors = {}
+
+
+def register(name, collector):
+    _collectors[name] = collector
+
+
+def collect():
+    return {name: collector() for name, collector in _collectors.items()}
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-16 20:48
+
+from django.db import migrations, models
+
+import core_app.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can not run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core_app', '0002_alter_insured_cpf'),
+    ]
+
+    operations = [
+        core_app.operations.AddIndexConcurrently(
+            model_name='insured',
+            index=models.Index(fields=['created_at', 'id'], name='insured_created_at_id_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Matches the expression of name__icontains on PostgreSQL,
+# UPPER("name"::text) LIKE UPPER('%term%'), so the search can use it.
+CREATE_NAME_TRGM_INDEX = (
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS insured_name_trgm_idx '
+    'ON core_app_insured USING gin ((UPPER("name"::text)) gin_trgm_ops)'
+)
+DROP_NAME_TRGM_INDEX = 'DROP INDEX CONCURRENTLY IF EXISTS insured_name_trgm_idx'
+
+
+def create_name_trgm_index(apps, schema_editor):
+    # Other databases search names with a table scan.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(CREATE_NAME_TRGM_INDEX)
+
+
+def drop_name_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_NAME_TRGM_INDEX)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can not run in a transaction, and does not
+    # block registrations while the index is built.
+    atomic = False
+
+    dependencies = [
+        ('core_app', '0003_insured_created_at_id_idx'),
+    ]
+
+    # CPF prefixes need no index of their own: the unique cpf column already
+    # has the varchar_pattern_ops index Django creates for LIKE 'prefix%'.
+    operations = [
+        migrations.RunPython(create_name_trgm_index, drop_name_trgm_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-16 21:15
+
+from django.db import migrations, models
+
+import core_app.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can not run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core_app', '0005_revokedtoken'),
+    ]
+
+    operations = [
+        core_app.operations.AddIndexConcurrently(
+            model_name='insured',
+            index=models.Index(fields=['updated_at'], name='insured_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.5 on 2026-10-16 21:20
+
+import django.db.models.functions.text
+from django.db import migrations, models, transaction
+from django.db.models import Count
+from django.db.models.functions import Lower, Now
+
+BATCH_SIZE = 5000
+
+# The index of the insured_email_lower_uniq constraint, built without
+# blocking registrations on PostgreSQL. No IF NOT EXISTS: a failed
+# concurrent build leaves an invalid index behind, to be dropped, not kept.
+CREATE_EMAIL_LOWER_UNIQ_INDEX = (
+    'CREATE UNIQUE INDEX {concurrently} insured_email_lower_uniq '
+    'ON core_app_insured (LOWER("email"))'
+)
+DROP_EMAIL_LOWER_UNIQ_INDEX = 'DROP INDEX {concurrently} IF EXISTS insured_email_lower_uniq'
+
+
+def lowercase_emails(apps, schema_editor):
+    """
+    Lowercases the e-mails stored before InsuredManager.normalize_email
+    did, BATCH_SIZE rows per transaction so that no lock is held for long.
+    updated_at is bumped on the rows changed, for incremental exports and
+    ETags.
+    """
+    Insured = apps.get_model('core_app', 'Insured')
+    insureds = Insured.objects.using(schema_editor.connection.alias)
+
+    clashes = list(
+        insureds.values(lower=Lower('email')).annotate(count=Count('pk')).filter(count__gt=1)
+        .values_list('lower', flat=True)[:20]
+    )
+    if clashes:
+        raise RuntimeError(
+            "Some insureds share an e-mail in different casings, merge them before migrating: "
+            + ', '.join(clashes)
+        )
+
+    last_pk = 0
+    while True:
+        pks = list(insureds.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE])
+        if not pks:
+            break
+        with transaction.atomic(using=schema_editor.connection.alias):
+            insureds.filter(pk__gte=pks[0], pk__lte=pks[-1]).exclude(email=Lower('email')).update(
+                email=Lower('email'), updated_at=Now(),
+            )
+        last_pk = pks[-1]
+
+
+def create_email_lower_uniq_index(apps, schema_editor):
+    # Other databases, like SQLite in local tests, build it in one go.
+    concurrently = 'CONCURRENTLY' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(CREATE_EMAIL_LOWER_UNIQ_INDEX.format(concurrently=concurrently))
+
+
+def drop_email_lower_uniq_index(apps, schema_editor):
+    concurrently = 'CONCURRENTLY' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(DROP_EMAIL_LOWER_UNIQ_INDEX.format(concurrently=concurrently))
+
+
+class Migration(migrations.Migration):
+    # Each batch of the backfill commits on its own, and CREATE INDEX
+    # CONCURRENTLY can not run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core_app', '0006_insured_updated_at_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        # The constraint is the unique index, built CONCURRENTLY: AddConstraint
+        # would block writes to the table while it is built.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_email_lower_uniq_index, drop_email_lower_uniq_index),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='insured',
+                    constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='insured_email_lower_uniq'),
+                ),
+            ],
+        ),
+    ]
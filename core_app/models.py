@@ -1,10 +1,20 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.db import models
+from django.db.models.functions import Lower
 
 from .validators import validate_cpf
 
 
 class InsuredManager(BaseUserManager):
+    @classmethod
+    def normalize_email(cls, email):
+        """
+        The canonical form e-mails are stored and looked up in: lowercased
+        as a whole, not only the domain like BaseUserManager does, so that
+        the casing sent by clients does not matter.
+        """
+        return super().normalize_email(email).strip().lower()
+
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError("The e-mail is required")
@@ -30,5 +40,33 @@ class Insured(AbstractBaseUser):
 
     objects = InsuredManager()
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of the back-office listing.
+            models.Index(fields=['created_at', 'id'], name='insured_created_at_id_idx'),
+            # Incremental exports (updated_at >= since).
+            models.Index(fields=['updated_at'], name='insured_updated_at_idx'),
+        ]
+        constraints = [
+            # E-mails are stored lowercased (InsuredManager.normalize_email),
+            # this also refuses rows written in another casing.
+            models.UniqueConstraint(Lower('email'), name='insured_email_lower_uniq'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class RevokedToken(models.Model):
+    """
+    A revoked token, by its jti, or every token of an Insured issued before
+    `issued_before`. Kept until the tokens it covers have expired.
+    """
+    insured = models.ForeignKey(Insured, on_delete=models.CASCADE, related_name='revoked_tokens')
+    jti = models.CharField(max_length=255, null=True, blank=True, unique=True)
+    issued_before = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.jti or f'{self.insured_id} before {self.issued_before}'
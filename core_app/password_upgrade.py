@@ -0,0 +1,130 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+
+from . import metrics
+from .hashing import hashing_limiter
+from .models import Insured
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordUpgrader:
+    """
+    Rehashes the passwords stored with an outdated hasher or work factor
+    after a successful login, off the request, instead of the inline save
+    of AbstractBaseUser.check_password().
+
+    Upgrades run one at a time on a background thread, and only when a
+    hashing_limiter slot frees up within INSURED_HASHING['QUEUE_TIMEOUT']:
+    under load they are skipped, and retried on a later login. At most
+    INSURED_PASSWORD_HASHING['MAX_PENDING'] wait, once per Insured. The new
+    hash is only written if the stored one is still the hash verified at
+    login, so a password changed meanwhile is kept. With SYNC, upgrades run
+    right away, as tests expect.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = set()
+        self.configure()
+
+    def configure(self):
+        options = settings.INSURED_PASSWORD_HASHING
+        self.enabled = options['UPGRADE']
+        self.sync = options['SYNC']
+        self.max_pending = options['MAX_PENDING']
+        with self._lock:
+            self.scheduled = 0
+            self.upgraded = 0
+            self.skipped = 0
+            self.failed = 0
+
+    def schedule(self, pk, password, encoded):
+        """
+        Upgrades `encoded`, the stored hash of `password` just verified for
+        the Insured `pk`, to the parameters of the preferred hasher.
+        """
+        if not self.enabled:
+            return
+        if self.sync:
+            self._upgrade(pk, password, encoded)
+            return
+
+        with self._lock:
+            if pk in self._pending or len(self._pending) >= self.max_pending:
+                self.skipped += 1
+                return
+            self._pending.add(pk)
+            self.scheduled += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='password-upgrade')
+        self._executor.submit(self._run, pk, password, encoded)
+
+    async def aschedule(self, pk, password, encoded):
+        if self.enabled and self.sync:
+            await sync_to_async(self._upgrade)(pk, password, encoded)
+        else:
+            self.schedule(pk, password, encoded)
+
+    def _run(self, pk, password, encoded):
+        try:
+            release = hashing_limiter.try_acquire(hashing_limiter.queue_timeout)
+            if release is None:
+                with self._lock:
+                    self.skipped += 1
+                return
+            try:
+                upgraded = make_password(password)
+            finally:
+                release()
+            self._write(pk, encoded, upgraded)
+        except Exception:
+            logger.exception("Could not upgrade the password hash of insured %s.", pk)
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self._pending.discard(pk)
+            # The connection of this thread is not managed by a request.
+            connections.close_all()
+
+    def _upgrade(self, pk, password, encoded):
+        self._write(pk, encoded, make_password(password))
+
+    def _write(self, pk, encoded, upgraded):
+        # update() leaves updated_at, and so the ETag of the profile, alone.
+        written = Insured.objects.filter(pk=pk, password=encoded).update(password=upgraded)
+        with self._lock:
+            if written:
+                self.upgraded += 1
+            else:
+                self.skipped += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'pending': len(self._pending),
+                'scheduled': self.scheduled,
+                'upgraded': self.upgraded,
+                'skipped': self.skipped,
+                'failed': self.failed,
+            }
+
+
+password_upgrader = PasswordUpgrader()
+metrics.register('password_upgrade', password_upgrader.stats)
+
+
+@receiver(setting_changed)
+def reconfigure_password_upgrader(setting, **kwargs):
+    if setting == 'INSURED_PASSWORD_HASHING':
+        password_upgrader.configure()
@@ -0,0 +1,61 @@
+import math
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def has_non_finite_float(data):
+    """
+    Whether `data`, made of dicts, lists and tuples, holds a NaN or an
+    infinite float, which orjson encodes as null.
+    """
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(has_non_finite_float(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(has_non_finite_float(value) for value in data)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer serializing with orjson when it is installed, which encodes
+    datetimes, UUIDs and the dict/list/str subclasses of DRF natively. Other
+    types (Decimal, lazy strings, ...) go through the DRF encoder.
+
+    The output means the same with or without orjson: U+2028 and U+2029 are
+    escaped like JSONRenderer does, and data holding NaN or infinite floats
+    is left to JSONRenderer, which rejects it in strict mode. Indented
+    output (`Accept: application/json; indent=4`), ASCII-only output
+    (UNICODE_JSON off) and installs without orjson use the stdlib json
+    module, like JSONRenderer.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        non_finite = []
+
+        def default(obj):
+            value = self.default(obj)
+            if isinstance(value, float) and not math.isfinite(value):
+                non_finite.append(value)
+            return value
+
+        ret = orjson.dumps(data, default=default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        # Non-finite floats come out as null: only then is the data walked.
+        if non_finite or (b'null' in ret and has_non_finite_float(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Valid JSON, but not valid JavaScript in a <script> tag.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def default(self, obj):
+        return JSONEncoder().default(obj)
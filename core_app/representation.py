@@ -0,0 +1,75 @@
+from operator import attrgetter, itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+
+def get_converter(field):
+    """
+    The function turning a non-null value into the representation of
+    `field`, shortcutting the common field types, and whether it also takes
+    the current timezone.
+    """
+    if type(field).to_representation is serializers.CharField.to_representation:
+        return str, False
+    if (
+        type(field).to_representation is serializers.DateTimeField.to_representation
+        and getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() == ISO_8601
+        and not hasattr(field, 'timezone')
+    ):
+        def datetime_to_iso(value, tz):
+            # Aware datetimes, as stored with USE_TZ; anything else takes the
+            # regular path.
+            if tz is None or isinstance(value, str) or value.utcoffset() is None:
+                return field.to_representation(value)
+            value = value.astimezone(tz).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return datetime_to_iso, True
+    return field.to_representation, False
+
+
+def get_timezone():
+    """
+    The timezone the compiled functions render datetimes in, to be looked up
+    once per response rather than per value.
+    """
+    return timezone.get_current_timezone() if settings.USE_TZ else None
+
+
+def compile_representation(serializer, from_mapping=False):
+    """
+    Compiles the readable fields of `serializer` into a plain function
+    `to_representation(instance, tz)` returning the same dict as its
+    to_representation(), for model instances, or for mappings such as the
+    rows of `.values()` when `from_mapping`. `tz` is from get_timezone().
+
+    The fields are built once here instead of on every serializer instance,
+    into (getter, field name, converter, takes timezone) tuples.
+    """
+    fields = []
+    for field in serializer._readable_fields:
+        if not field.source.isidentifier():
+            raise ImproperlyConfigured(
+                f"{type(serializer).__name__}.{field.field_name} can not be compiled, its source is {field.source!r}."
+            )
+        getter = itemgetter(field.source) if from_mapping else attrgetter(field.source)
+        fields.append((getter, field.field_name, *get_converter(field)))
+    fields = tuple(fields)
+
+    def to_representation(instance, tz):
+        ret = {}
+        for getter, name, convert, takes_timezone in fields:
+            value = getter(instance)
+            if value is None:
+                ret[name] = None
+            elif takes_timezone:
+                ret[name] = convert(value, tz)
+            else:
+                ret[name] = convert(value)
+        return ret
+    return to_representation
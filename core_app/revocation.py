@@ -0,0 +1,269 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from . import metrics
+from .models import RevokedToken
+from .tokens import epoch_microseconds, issued_at
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Set membership with no false negatives and about `false_positive_rate`
+    false positives once `capacity` items were added.
+    """
+    def __init__(self, capacity, false_positive_rate):
+        self.size = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing of one digest instead of `hashes` digests.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Tells whether a token was revoked, without I/O for most tokens.
+
+    Each worker keeps the jtis of RevokedToken in a Bloom filter: tokens
+    missing from it are accepted, only filter hits are checked against the
+    table. Revocations of every token of an Insured are few and kept exactly,
+    by Insured, so they never need a query.
+
+    Both load the newly revoked tokens every INSURED_REVOCATION
+    ['REFRESH_INTERVAL'] seconds, so a token revoked by another worker is
+    refused by this one within that delay, and are rebuilt every
+    REBUILD_INTERVAL seconds to drop the expired ones. Revocations made by
+    this worker apply to it right away.
+    """
+    # Revocations committed late are still loaded by the next refresh.
+    refresh_overlap = timedelta(seconds=60)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.configure()
+
+    def configure(self):
+        options = settings.INSURED_REVOCATION
+        self.enabled = options['ENABLED']
+        self.refresh_interval = options['REFRESH_INTERVAL']
+        self.rebuild_interval = options['REBUILD_INTERVAL']
+        self.capacity = options['CAPACITY']
+        self.false_positive_rate = options['FALSE_POSITIVE_RATE']
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            self._insureds = {}
+            self._refresh_at = 0.0
+            self._rebuild_at = 0.0
+            self._loaded_since = None
+            self.checks = 0
+            self.filter_hits = 0
+            self.revoked = 0
+            self.refreshes = 0
+            self.rebuilds = 0
+
+    def _check(self, user_id, payload):
+        """
+        True or False when the token is known to be revoked or not, None
+        when the table has to tell.
+        """
+        jti = payload.get(jwt_settings.JTI_CLAIM)
+        with self._lock:
+            self.checks += 1
+            issued_before = self._insureds.get(user_id)
+            if issued_before is not None and issued_at(payload) < issued_before:
+                self.revoked += 1
+                return True
+            if jti is None or jti not in self._filter:
+                return False
+            self.filter_hits += 1
+        return None
+
+    def _count_revoked(self, revoked):
+        if revoked:
+            with self._lock:
+                self.revoked += 1
+        return revoked
+
+    def is_revoked(self, user_id, payload):
+        """
+        Whether the token of `payload`, verified for `user_id`, was revoked.
+        """
+        if not self.enabled:
+            return False
+        if time.monotonic() >= self._refresh_at:
+            self.refresh()
+        revoked = self._check(user_id, payload)
+        if revoked is not None:
+            return revoked
+        jti = payload[jwt_settings.JTI_CLAIM]
+        return self._count_revoked(RevokedToken.objects.filter(jti=jti).exists())
+
+    async def ais_revoked(self, user_id, payload):
+        """
+        is_revoked() for async views.
+        """
+        if not self.enabled:
+            return False
+        if time.monotonic() >= self._refresh_at:
+            await sync_to_async(self.refresh)()
+        revoked = self._check(user_id, payload)
+        if revoked is not None:
+            return revoked
+        jti = payload[jwt_settings.JTI_CLAIM]
+        return self._count_revoked(await RevokedToken.objects.filter(jti=jti).aexists())
+
+    def refresh(self):
+        """
+        Loads the tokens revoked since the last refresh, or rebuilds from the
+        whole table when it is due.
+        """
+        # One thread refreshes, the others keep using the current state.
+        if not self._refresh_lock.acquire(blocking=self._filter is None):
+            return
+        try:
+            if self._filter is None or time.monotonic() >= self._rebuild_at:
+                self._rebuild()
+            else:
+                self._load_recent()
+        except Exception:
+            if self._filter is None:
+                raise
+            logger.exception("Could not refresh the revoked tokens, keeping the current ones.")
+        finally:
+            self._refresh_at = time.monotonic() + self.refresh_interval
+            self._refresh_lock.release()
+
+    def _rebuild(self):
+        started = timezone.now()
+        RevokedToken.objects.filter(expires_at__lte=started).delete()
+        bloom = BloomFilter(self.capacity, self.false_positive_rate)
+        insureds = {}
+        for insured_id, jti, issued_before in self._rows(RevokedToken.objects.all()):
+            if jti:
+                bloom.add(jti)
+            else:
+                insureds[insured_id] = max(insureds.get(insured_id, 0), epoch_microseconds(issued_before))
+        with self._lock:
+            self._filter = bloom
+            self._insureds = insureds
+            self._loaded_since = started
+            self._rebuild_at = time.monotonic() + self.rebuild_interval
+            self.rebuilds += 1
+
+    def _load_recent(self):
+        started = timezone.now()
+        recent = RevokedToken.objects.filter(created_at__gte=self._loaded_since - self.refresh_overlap)
+        for insured_id, jti, issued_before in self._rows(recent):
+            if jti:
+                self.add_token(jti)
+            else:
+                self.add_insured(insured_id, issued_before)
+        with self._lock:
+            self._loaded_since = started
+            self.refreshes += 1
+
+    @staticmethod
+    def _rows(queryset):
+        return queryset.values_list('insured_id', 'jti', 'issued_before').iterator()
+
+    def add_token(self, jti):
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def add_insured(self, insured_id, issued_before):
+        timestamp = epoch_microseconds(issued_before)
+        with self._lock:
+            if self._filter is not None and timestamp > self._insureds.get(insured_id, 0):
+                self._insureds[insured_id] = timestamp
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'checks': self.checks,
+                'filter_hits': self.filter_hits,
+                'revoked': self.revoked,
+                'refreshes': self.refreshes,
+                'rebuilds': self.rebuilds,
+                'revoked_insureds': len(self._insureds),
+                'filter_bits': self._filter.size if self._filter is not None else 0,
+                'filter_hashes': self._filter.hashes if self._filter is not None else 0,
+            }
+
+
+revocation_list = RevocationList()
+metrics.register('revocation', revocation_list.stats)
+
+
+@receiver(setting_changed)
+def reconfigure_revocation_list(setting, **kwargs):
+    if setting == 'INSURED_REVOCATION':
+        revocation_list.configure()
+
+
+def revoke_token(payload):
+    """
+    Revokes the token of a verified `payload` until it expires.
+    """
+    jti = payload[jwt_settings.JTI_CLAIM]
+    RevokedToken.objects.get_or_create(jti=jti, defaults={
+        'insured_id': payload[jwt_settings.USER_ID_CLAIM],
+        'expires_at': datetime.fromtimestamp(payload['exp'], tz=dt_timezone.utc),
+    })
+    revocation_list.add_token(jti)
+
+
+def revoke_insured_tokens(insured_id):
+    """
+    Revokes every token issued to the Insured until now, e.g. when its
+    password changes.
+    """
+    bulk_revoke_insured_tokens([insured_id])
+
+
+def bulk_revoke_insured_tokens(insured_ids, batch_size=1000):
+    """
+    revoke_insured_tokens() for many Insureds, inserted `batch_size` rows
+    per INSERT. Returns how many Insureds were revoked.
+    """
+    # Compared with the issue time of the tokens in microseconds, so that the
+    # logins following the revocation are not revoked.
+    issued_before = timezone.now()
+    expires_at = issued_before + max(jwt_settings.ACCESS_TOKEN_LIFETIME, jwt_settings.REFRESH_TOKEN_LIFETIME)
+    RevokedToken.objects.bulk_create([
+        RevokedToken(insured_id=insured_id, issued_before=issued_before, expires_at=expires_at)
+        for insured_id in insured_ids
+    ], batch_size=batch_size)
+    for insured_id in insured_ids:
+        revocation_list.add_insured(insured_id, issued_before)
+    return len(insured_ids)
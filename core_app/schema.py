@@ -0,0 +1,143 @@
+import gzip
+import hashlib
+import json
+import threading
+
+import yaml
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def accepted_codings(accept_encoding):
+    """
+    The content codings of an Accept-Encoding header, lowercased, without
+    those refused with q=0.
+    """
+    accepted = set()
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class SchemaDocument:
+    """
+    One rendering (YAML or JSON) of the OpenAPI document, compressed once
+    with each content coding the clients may accept.
+    """
+    def __init__(self, content):
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        self.variants = {'identity': content, 'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(content)
+        # Strong ETags, so each coding gets its own.
+        self.etags = {
+            coding: quote_etag(digest if coding == 'identity' else f'{digest}-{coding}')
+            for coding in self.variants
+        }
+
+    def get_coding(self, accept_encoding):
+        accepted = accepted_codings(accept_encoding)
+        for coding in ('br', 'gzip'):
+            if coding in self.variants and (coding in accepted or '*' in accepted):
+                return coding
+        return 'identity'
+
+    def response(self, request, content_type):
+        coding = self.get_coding(request.headers.get('Accept-Encoding', ''))
+        if set(parse_etags(request.headers.get('If-None-Match', ''))) & set(self.etags.values()):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(self.variants[coding], content_type=content_type)
+            if coding != 'identity':
+                response['Content-Encoding'] = coding
+        response['ETag'] = self.etags[coding]
+        response['Vary'] = 'Accept, Accept-Encoding'
+        # Cacheable by the gateway, revalidated with the ETag on each use.
+        response['Cache-Control'] = 'public, no-cache'
+        return response
+
+
+class SchemaCache:
+    """
+    Keeps the OpenAPI document of the API in memory, so /api/schema/ does not
+    introspect every view on each request.
+
+    The document is read from INSURED_SCHEMA['FILE'] when set (built with
+    `manage.py spectacular --format openapi-json --file <FILE>`), otherwise
+    it is generated once, on load() at startup or on the first request.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(self):
+        options = settings.INSURED_SCHEMA
+        self.enabled = options['CACHED']
+        self.file = options['FILE']
+        self._documents = None
+
+    def load(self):
+        if self._documents is None:
+            with self._lock:
+                if self._documents is None:
+                    schema = self.read() if self.file else self.generate()
+                    self._documents = {
+                        'yaml': SchemaDocument(OpenApiYamlRenderer().render(schema)),
+                        'json': SchemaDocument(OpenApiJsonRenderer().render(schema, renderer_context={})),
+                    }
+        return self._documents
+
+    def get(self, format):
+        return self.load()[format]
+
+    def read(self):
+        with open(self.file, encoding='utf-8') as f:
+            if self.file.endswith('.json'):
+                return json.load(f)
+            return yaml.safe_load(f)
+
+    def generate(self):
+        generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+        return generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+
+
+schema_cache = SchemaCache()
+
+
+@receiver(setting_changed)
+def reconfigure_schema_cache(setting, **kwargs):
+    if setting in ('INSURED_SCHEMA', 'SPECTACULAR_SETTINGS'):
+        schema_cache.configure()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    SpectacularAPIView answering from the schema cache, with gzip (and brotli,
+    when the package is installed) variants and ETags.
+    """
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        document = schema_cache.get(request.accepted_renderer.format)
+        return document.response(request, request.accepted_media_type)
@@ -1,9 +1,21 @@
 import re
+from collections.abc import Mapping
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Q
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.settings import api_settings
+from rest_framework.utils.field_mapping import get_unique_error_message
+from rest_framework_simplejwt.exceptions import TokenError
 
+from .hashing import hashing_executor
 from .models import Insured
+from .password_upgrade import password_upgrader
+from .representation import compile_representation, get_timezone
+from .tokens import InsuredRefreshToken
 from .validators import validate_cpf
 
 
@@ -20,6 +32,9 @@ class InsuredSerializer(serializers.ModelSerializer):
         validate_cpf(digits)
         return digits
 
+    def validate_email(self, value):
+        return Insured.objects.normalize_email(value)
+
     def create(self, validated_data):
         password = validated_data.pop('password')
         insured = Insured(**validated_data)
@@ -28,6 +43,288 @@ class InsuredSerializer(serializers.ModelSerializer):
         return insured
 
 
+class InsuredReadListSerializer(serializers.ListSerializer):
+    """
+    Lists of InsuredReadSerializer: looks the timezone and the compiled
+    function up once for the whole list.
+    """
+    def to_representation(self, data):
+        items = data.all() if isinstance(data, models.manager.BaseManager) else data
+        child = type(self.child)
+        if child._to_representation is None:
+            child.compile()
+        tz = get_timezone()
+        ret = []
+        for item in items:
+            to_representation = child._row_to_representation if isinstance(item, Mapping) else child._to_representation
+            ret.append(to_representation(item, tz))
+        return ret
+
+
+class InsuredReadSerializer(InsuredSerializer):
+    """
+    InsuredSerializer for responses. Its representation is compiled once
+    from the fields of InsuredSerializer into plain functions, so instances
+    never build their fields. Accepts Insureds or `.values()` rows.
+
+    The views document their responses with InsuredSerializer, whose output
+    is the same, so the schema keeps a single Insured component.
+    """
+    _to_representation = None
+    _row_to_representation = None
+
+    class Meta(InsuredSerializer.Meta):
+        list_serializer_class = InsuredReadListSerializer
+
+    @classmethod
+    def compile(cls):
+        cls._to_representation = staticmethod(compile_representation(InsuredSerializer()))
+        cls._row_to_representation = staticmethod(compile_representation(InsuredSerializer(), from_mapping=True))
+
+    def to_representation(self, instance):
+        if self._to_representation is None:
+            self.compile()
+        if isinstance(instance, Mapping):
+            return self._row_to_representation(instance, get_timezone())
+        return self._to_representation(instance, get_timezone())
+
+
+def get_unique_violation_errors(error, insured):
+    """
+    Maps the IntegrityError raised when saving `insured` to the field errors
+    of its unique fields, with the messages of the ModelSerializer
+    UniqueValidators. Returns None if the error is not a unique violation.
+    """
+    diag = getattr(error.__cause__, 'diag', None)
+    detail = getattr(diag, 'constraint_name', None) or str(error)
+    fields = [
+        field for field in Insured._meta.concrete_fields
+        if field.unique and not field.primary_key
+    ]
+    if not any(field.column in detail for field in fields):
+        return None
+
+    # Only reached on conflicts: one query to report every field taken, as
+    # the validators did, and not just the constraint checked first.
+    lookup = Q()
+    for field in fields:
+        lookup |= Q(**{field.name: getattr(insured, field.attname)})
+    taken = Insured.objects.filter(lookup).values(*[field.name for field in fields])
+    errors = {}
+    for row in taken:
+        for field in fields:
+            if row[field.name] == getattr(insured, field.attname):
+                errors[field.name] = [get_unique_error_message(field)]
+    return errors or {
+        field.name: [get_unique_error_message(field)]
+        for field in fields if field.column in detail
+    }
+
+
+def insert_insured(insured):
+    """
+    Inserts a new Insured in a single round-trip, relying on the unique
+    constraints of the table instead of looking the values up beforehand.
+    Raises ValidationError with the field errors on conflicts.
+    """
+    try:
+        if connection.in_atomic_block:
+            # Keeps the surrounding transaction usable after a conflict.
+            with transaction.atomic():
+                insured.save(force_insert=True)
+        else:
+            insured.save(force_insert=True)
+    except IntegrityError as error:
+        errors = get_unique_violation_errors(error, insured)
+        if errors is None:
+            raise
+        raise serializers.ValidationError(errors)
+    return insured
+
+
+class InsuredRegistrationSerializer(InsuredSerializer):
+    """
+    InsuredSerializer for registration. Uniqueness of email and cpf is left
+    to the database, so registering is a single INSERT and two concurrent
+    registrations can not both pass the checks.
+    """
+    class Meta(InsuredSerializer.Meta):
+        extra_kwargs = {
+            'password': {'write_only': True},
+            'email': {'validators': []},
+            # Masked cpfs are reduced to their 11 digits by validate_cpf.
+            'cpf': {'validators': [], 'max_length': 14},
+        }
+
+    def create(self, validated_data):
+        password = validated_data.pop('password')
+        insured = Insured(**validated_data)
+        insured.set_password(password)
+        return insert_insured(insured)
+
+
+class InsuredAsyncSerializer(InsuredRegistrationSerializer):
+    """
+    InsuredRegistrationSerializer for async views, hashing the password on
+    the hashing pool.
+    """
+    async def asave(self):
+        data = dict(self.validated_data)
+        password = data.pop('password')
+        insured = Insured(**data)
+        insured.password = await hashing_executor.run(make_password, password)
+        self.instance = await sync_to_async(insert_insured)(insured)
+        return self.instance
+
+
+class InsuredBulkItemSerializer(InsuredRegistrationSerializer):
+    """
+    Validates a single row of a bulk registration. Uniqueness of email and
+    cpf is checked once for the whole batch by InsuredBulkSerializer.
+    """
+
+
+class InsuredBulkSerializer(serializers.Serializer):
+    insureds = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.INSURED_BULK_MAX_SIZE,
+    )
+
+    def validate(self, data):
+        rows = []
+        errors = []
+        for index, item in enumerate(data['insureds']):
+            serializer = InsuredBulkItemSerializer(data=item)
+            if serializer.is_valid():
+                rows.append((index, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        existing = {
+            'email': set(Insured.objects.filter(
+                email__in=[row['email'] for _, row in rows]
+            ).values_list('email', flat=True)),
+            'cpf': set(Insured.objects.filter(
+                cpf__in=[row['cpf'] for _, row in rows]
+            ).values_list('cpf', flat=True)),
+        }
+        seen = {'email': set(), 'cpf': set()}
+
+        valid_rows = []
+        for index, row in rows:
+            row_errors = {}
+            for field in ('email', 'cpf'):
+                value = row[field]
+                if value in existing[field]:
+                    row_errors[field] = [get_unique_error_message(Insured._meta.get_field(field))]
+                elif value in seen[field]:
+                    row_errors[field] = ['Duplicated in this batch.']
+            if row_errors:
+                errors.append({'index': index, 'errors': row_errors})
+                continue
+            seen['email'].add(row['email'])
+            seen['cpf'].add(row['cpf'])
+            valid_rows.append(row)
+
+        errors.sort(key=lambda error: error['index'])
+        return {'insureds': valid_rows, 'errors': errors}
+
+    def create(self, validated_data):
+        rows = validated_data['insureds']
+        # Hashed on the hashing pool, each password taking a hashing slot.
+        passwords = hashing_executor.map(make_password, [row.pop('password') for row in rows])
+        insureds = [Insured(password=password, **row) for row, password in zip(rows, passwords)]
+
+        try:
+            with transaction.atomic():
+                Insured.objects.bulk_create(insureds, batch_size=settings.INSURED_BULK_CHUNK_SIZE)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                "The batch conflicts with insureds registered meanwhile, send it again."
+            )
+        return insureds
+
+
+class InsuredListFilterSerializer(serializers.Serializer):
+    """
+    Query parameters filtering the back-office listing of Insureds.
+    """
+    created_after = serializers.DateTimeField(required=False, help_text="Created at or after this moment.")
+    created_before = serializers.DateTimeField(required=False, help_text="Created before this moment.")
+    cpf = serializers.CharField(required=False, help_text="Exact CPF, masked or not.")
+    email = serializers.EmailField(required=False, help_text="Exact e-mail.")
+
+    def validate_cpf(self, value):
+        return re.sub(r'\D', '', value)
+
+    def validate_email(self, value):
+        return Insured.objects.normalize_email(value)
+
+    def filter(self, queryset):
+        lookups = {
+            'created_after': 'created_at__gte',
+            'created_before': 'created_at__lt',
+            'cpf': 'cpf',
+            'email': 'email',
+        }
+        return queryset.filter(**{
+            lookups[name]: value for name, value in self.validated_data.items()
+        })
+
+
+class InsuredSearchSerializer(serializers.Serializer):
+    """
+    Search term of the back-office search. Terms made of digits (masked or
+    not) match CPFs by prefix, the others match names by substring, case
+    insensitively. Both shapes are served by indexes on PostgreSQL.
+    """
+    # A trigram index can not narrow down shorter name terms.
+    min_name_length = 3
+
+    q = serializers.CharField(
+        max_length=50,
+        help_text="Beginning of a CPF, or part of a name (at least 3 characters).",
+    )
+
+    def validate_q(self, value):
+        value = value.strip()
+        digits = re.sub(r'\D', '', value)
+        if digits and re.fullmatch(r'[\d.\-\s]+', value):
+            return {'cpf__startswith': digits}
+        if len(value) < self.min_name_length:
+            raise serializers.ValidationError(
+                f"Search names with at least {self.min_name_length} characters."
+            )
+        return {'name__icontains': value}
+
+    def filter(self, queryset):
+        return queryset.filter(**self.validated_data['q'])
+
+
+class InsuredExportSerializer(serializers.ModelSerializer):
+    """
+    Rows of the export of Insureds, compiled from `.values()` rows by
+    core_app.export.
+    """
+    class Meta:
+        model = Insured
+        fields = ['id', 'name', 'email', 'cpf', 'created_at', 'updated_at']
+
+
+class InsuredExportFilterSerializer(serializers.Serializer):
+    """
+    Query parameters of the back-office export of Insureds.
+    """
+    type = serializers.ChoiceField(
+        choices=['ndjson', 'csv'], default='ndjson',
+        help_text="NDJSON (one JSON object per line) or CSV with a header.",
+    )
+    since = serializers.DateTimeField(
+        required=False, help_text="Only insureds updated at or after this moment, for incremental extracts.",
+    )
+
+
 class InsuredEditSerializer(serializers.Serializer):
     name = serializers.CharField(allow_blank=False)
     password = serializers.CharField(min_length=6, allow_blank=True)
@@ -38,7 +335,8 @@ class InsuredEditSerializer(serializers.Serializer):
         password = data.get("password")
         password_confirmation = data.get("password_confirmation")
         
-        result = {'name': name}
+        # Only the fields sent, all of which are written.
+        result = {'name': name} if name is not None else {}
         
         if password and not password_confirmation or password_confirmation and not password:
             raise serializers.ValidationError("password and password needs to be both informed.")
@@ -54,6 +352,10 @@ class InsuredLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
+    def validate_email(self, value):
+        # A single probe of the unique index, whatever the casing sent.
+        return Insured.objects.normalize_email(value)
+
     def validate(self, data):
         email = data.get("email")
         password = data.get("password")
@@ -63,14 +365,59 @@ class InsuredLoginSerializer(serializers.Serializer):
         except Insured.DoesNotExist:
             raise serializers.ValidationError("E-mail or password are incorrect")
 
-        if not insured.check_password(password):
+        is_correct, must_update = verify_password(password, insured.password)
+        if not is_correct:
             raise serializers.ValidationError("E-mail or password are incorrect")
+        if must_update:
+            password_upgrader.schedule(insured.pk, password, insured.password)
 
-        refresh = RefreshToken.for_user(insured)
+        return self.get_tokens(insured)
+
+    def get_tokens(self, insured):
+        refresh = InsuredRefreshToken.for_user(insured)
         return {
             'refresh': str(refresh),
             'access': str(refresh.access_token),
             'insured': insured,
             'insured_id': insured.pk,
             'email': insured.email,
-        }
\ No newline at end of file
+        }
+
+
+class InsuredLogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
+
+    def validate_refresh(self, value):
+        try:
+            return InsuredRefreshToken(value).payload
+        except TokenError:
+            raise serializers.ValidationError("Invalid or expired refresh token.")
+
+
+class InsuredAsyncLoginSerializer(InsuredLoginSerializer):
+    """
+    InsuredLoginSerializer for async views. is_valid() only validates the
+    fields, the credentials are checked by aauthenticate().
+    """
+    def validate(self, data):
+        return data
+
+    async def aauthenticate(self):
+        email = self.validated_data["email"]
+        password = self.validated_data["password"]
+        error = serializers.ValidationError({
+            api_settings.NON_FIELD_ERRORS_KEY: ["E-mail or password are incorrect"]
+        })
+
+        try:
+            insured = await Insured.objects.aget(email=email)
+        except Insured.DoesNotExist:
+            raise error
+
+        is_correct, must_update = await hashing_executor.run(verify_password, password, insured.password)
+        if not is_correct:
+            raise error
+        if must_update:
+            await password_upgrader.aschedule(insured.pk, password, insured.password)
+
+        return self.get_tokens(insured)
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import principal_cache
+from .models import Insured
+
+
+@receiver([post_save, post_delete], sender=Insured)
+def invalidate_principal(sender, instance, **kwargs):
+    principal_cache.delete(instance.pk)
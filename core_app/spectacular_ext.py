@@ -2,6 +2,7 @@ from drf_spectacular.extensions import OpenApiAuthenticationExtension
 
 class InsuredJWTScheme(OpenApiAuthenticationExtension):
     target_class = 'core_app.auth.InsuredJWTAuthentication'
+    match_subclasses = True
     name = 'insuredJWT' 
 
     def get_security_definition(self, auto_schema):
@@ -11,3 +12,12 @@ class InsuredJWTScheme(OpenApiAuthenticationExtension):
             'bearerFormat': 'JWT',
             'description': 'JWT Bearer token. Use: Authorization: Bearer <access_token>',
         }
+
+
+class InsuredLazyJWTScheme(InsuredJWTScheme):
+    # Spectacular identifies a scheme by its authentication class, so the
+    # lazy subclass needs its own name. Its priority wins over the match of
+    # InsuredJWTScheme on subclasses.
+    target_class = 'core_app.auth.InsuredLazyJWTAuthentication'
+    name = 'insuredLazyJWT'
+    priority = 1
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class InsuredTestRunner(DiscoverRunner):
+    """
+    Writes last_login on each login for the whole run: the background
+    flusher would otherwise write into the test database from its thread.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._last_login_sync = override_settings(INSURED_LAST_LOGIN=dict(settings.INSURED_LAST_LOGIN, SYNC=True))
+        self._last_login_sync.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._last_login_sync.disable()
+        super().teardown_test_environment(**kwargs)
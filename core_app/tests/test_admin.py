@@ -0,0 +1,65 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core_app.models import Insured, RevokedToken
+from core_app.pagination import EstimatedCountPaginator, estimate_count
+
+CHANGELIST_URL = '/admin/core_app/insured/'
+CPFS = ['52998224725', '16899535009', '11144477735']
+
+
+class InsuredAdminChangelistTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'admin'))
+        for i, cpf in enumerate(CPFS):
+            Insured.objects.create(name=f'User {i}', email=f'user{i}@example.com', cpf=cpf)
+
+    def _names(self, **params):
+        resp = self.client.get(CHANGELIST_URL, params)
+        self.assertEqual(resp.status_code, 200)
+        return sorted(insured.name for insured in resp.context['cl'].result_list)
+
+    def test_counts_once_and_reads_the_listed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._names(), ['User 0', 'User 1', 'User 2'])
+        table = Insured._meta.db_table
+        selects = [q['sql'] for q in queries if f'FROM "{table}"' in q['sql']]
+        self.assertEqual(sum('COUNT(' in sql for sql in selects), 1)
+        listing = [sql for sql in selects if 'ORDER BY' in sql and 'COUNT(' not in sql]
+        self.assertTrue(listing)
+        self.assertNotIn('"password"', listing[-1])
+
+    def test_search_uses_exact_cpf_or_email_prefix(self):
+        self.assertEqual(self._names(q='168.995.350-09'), ['User 1'])
+        self.assertEqual(self._names(q='user2@'), ['User 2'])
+        # Neither a part of the CPF nor of the name is searched.
+        self.assertEqual(self._names(q='16899'), [])
+        self.assertEqual(self._names(q='User 1'), [])
+
+    def test_revoke_tokens_of_every_insured(self):
+        selected = Insured.objects.first().pk
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.post(CHANGELIST_URL, {
+                'action': 'revoke_tokens', 'select_across': '1', 'index': '0', '_selected_action': [selected],
+            })
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(RevokedToken.objects.count(), len(CPFS))
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len([sql for sql in inserts if RevokedToken._meta.db_table in sql]), 1)
+        table = Insured._meta.db_table
+        self.assertFalse([q for q in queries if f'"{table}"."password"' in q['sql']])
+
+    def test_date_hierarchy(self):
+        year = Insured.objects.first().created_at.year
+        self.assertEqual(len(self._names(created_at__year=year)), len(CPFS))
+        self.assertEqual(self._names(created_at__year=year - 1), [])
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_exact_count_without_an_estimate(self):
+        Insured.objects.create(name='John Doe', email='john@example.com', cpf=CPFS[0])
+        if connection.vendor != 'postgresql':
+            self.assertIsNone(estimate_count(Insured.objects.all()))
+        self.assertEqual(EstimatedCountPaginator(Insured.objects.order_by('pk'), 10).count, 1)
@@ -0,0 +1,124 @@
+import base64
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from core_app.async_views import (
+    InsuredAsyncEditView,
+    InsuredAsyncLoginView,
+    InsuredAsyncMeView,
+    InsuredAsyncRegistrationView,
+)
+from core_app.hashing import hashing_executor
+from core_app.models import Insured
+from core_app.revocation import revocation_list
+
+
+class InsuredAsyncViewsTests(TestCase):
+    def setUp(self):
+        # Drops the revocations of insureds of earlier tests, whose pks are reused.
+        revocation_list.configure()
+        revocation_list.refresh()
+        self.factory = APIRequestFactory()
+
+    def _post(self, view, url, payload):
+        request = self.factory.post(url, payload, format='json')
+        response = async_to_sync(view.as_view())(request)
+        return response.render()
+
+    def _register(self, **overrides):
+        payload = {'name': 'John Doe', 'email': 'john@example.com', 'cpf': '52998224725', 'password': 's3cr3t!'}
+        payload.update(overrides)
+        return self._post(InsuredAsyncRegistrationView, '/api/v1/insureds/', payload)
+
+    def _login(self, email='john@example.com', password='s3cr3t!'):
+        return self._post(InsuredAsyncLoginView, '/api/v1/login/', {'email': email, 'password': password})
+
+    def test_register(self):
+        completed = hashing_executor.stats()['completed']
+        resp = self._register()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertNotIn('password', resp.data)
+        self.assertEqual(resp.data['email'], 'john@example.com')
+        self.assertTrue(Insured.objects.get(email='john@example.com').check_password('s3cr3t!'))
+        self.assertEqual(hashing_executor.stats()['completed'], completed + 1)
+
+    def test_register_unique_violation_matches_sync_payload(self):
+        self._register()
+        resp = self._register(cpf='16899535009')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        sync = self.client.post('/api/v1/insureds/', {
+            'name': 'John Doe', 'email': 'john@example.com', 'cpf': '16899535009', 'password': 's3cr3t!',
+        }, format='json')
+        self.assertEqual(resp.data, sync.json())
+
+    def test_register_invalid_cpf(self):
+        resp = self._register(cpf='52998224724')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cpf', resp.data)
+
+    def test_login(self):
+        self._register()
+        resp = self._login()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(set(resp.data), {'refresh', 'access', 'insured_id', 'email'})
+        self.assertIsNotNone(Insured.objects.get(email='john@example.com').last_login)
+
+    def test_login_wrong_credentials(self):
+        self._register()
+        for email, password in (('john@example.com', 'wrong'), ('nope@example.com', 's3cr3t!')):
+            resp = self._login(email, password)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(resp.data, {'non_field_errors': ['E-mail or password are incorrect']})
+
+    def _authenticated(self, view, method, url, payload=None, **headers):
+        self._register()
+        access = self._login().data['access']
+        request = getattr(self.factory, method)(
+            url, payload, format='json', HTTP_AUTHORIZATION=f'Bearer {access}', **headers,
+        )
+        return async_to_sync(view.as_view())(request).render()
+
+    def test_edit(self):
+        resp = self._authenticated(InsuredAsyncEditView, 'patch', '/api/v1/insureds/edit/', {
+            'name': 'John Updated', 'password': 'n3w-s3cr3t', 'password_confirmation': 'n3w-s3cr3t',
+        })
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(resp.data['name'], 'John Updated')
+        self.assertIn('ETag', resp.headers)
+        insured = Insured.objects.get(email='john@example.com')
+        self.assertEqual(insured.name, 'John Updated')
+        self.assertTrue(insured.check_password('n3w-s3cr3t'))
+
+    def test_edit_if_match_mismatch(self):
+        resp = self._authenticated(
+            InsuredAsyncEditView, 'patch', '/api/v1/insureds/edit/', {'name': 'John Updated'},
+            HTTP_IF_MATCH='"0-0"',
+        )
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(Insured.objects.get(email='john@example.com').name, 'John Doe')
+
+    def test_me(self):
+        resp = self._authenticated(InsuredAsyncMeView, 'get', '/api/v1/insureds/me/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(resp.data['email'], 'john@example.com')
+        self.assertEqual(resp.headers['ETag'], self.client.get(
+            '/api/v1/insureds/me/', HTTP_AUTHORIZATION=f'Bearer {self._login().data["access"]}',
+        )['ETag'])
+
+    def test_me_invalid_token(self):
+        request = self.factory.get('/api/v1/insureds/me/', HTTP_AUTHORIZATION='Bearer nope')
+        resp = async_to_sync(InsuredAsyncMeView.as_view())(request).render()
+        self.assertIn(resp.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        self.assertEqual(str(resp.data['detail']), 'Invalid token.')
+
+    def test_metrics_report_hashing_queue(self):
+        self.assertEqual(self.client.get('/api/v1/metrics/').status_code, status.HTTP_401_UNAUTHORIZED)
+        User.objects.create_user('admin', password='admin', is_staff=True)
+        resp = self.client.get('/api/v1/metrics/', HTTP_AUTHORIZATION='Basic ' + base64.b64encode(b'admin:admin').decode())
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(resp.json()['hashing']), {'max_workers', 'queued', 'running', 'completed'})
+        self.assertIn('principal_cache', resp.json())
@@ -0,0 +1,230 @@
+import jwt
+import pickle
+from unittest import skipUnless
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core_app.auth import InsuredJWTAuthentication, InsuredLazyJWTAuthentication, LazyInsured
+from core_app.cache import principal_cache
+from core_app.keyring import key_ring
+from core_app.models import Insured
+from core_app.revocation import revocation_list
+from core_app.serializers import InsuredLoginSerializer
+from core_app.tokens import InsuredRefreshToken
+
+CACHE_ENABLED = {'ENABLED': True, 'MAX_SIZE': 2, 'TTL': 60, 'BACKEND': None}
+
+
+class InsuredJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        # Loaded now, so that no refresh runs among the counted queries.
+        revocation_list.configure()
+        revocation_list.refresh()
+        self.insured = Insured.objects.create(name='John Doe', email='john@example.com', cpf='52998224725')
+        self.factory = APIRequestFactory()
+
+    def _authenticate(self, insured=None):
+        token = RefreshToken.for_user(insured or self.insured).access_token
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return InsuredJWTAuthentication().authenticate(request)
+
+    def test_authenticate_returns_insured(self):
+        user, _ = self._authenticate()
+        self.assertEqual(user.pk, self.insured.pk)
+
+    def test_refresh_token_is_rejected(self):
+        token = RefreshToken.for_user(self.insured)
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        with self.assertRaises(AuthenticationFailed):
+            InsuredJWTAuthentication().authenticate(request)
+
+    def test_cache_disabled_by_default(self):
+        self._authenticate()
+        with self.assertNumQueries(1):
+            self._authenticate()
+
+    @override_settings(INSURED_PRINCIPAL_CACHE=CACHE_ENABLED)
+    def test_cached_principal_skips_query(self):
+        self._authenticate()
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate()
+        self.assertEqual(user.email, 'john@example.com')
+        stats = principal_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+
+    @override_settings(INSURED_PRINCIPAL_CACHE=CACHE_ENABLED)
+    def test_save_and_delete_invalidate_principal(self):
+        self._authenticate()
+        self.insured.name = 'John Updated'
+        self.insured.save()
+        with self.assertNumQueries(1):
+            user, _ = self._authenticate()
+        self.assertEqual(user.name, 'John Updated')
+
+        self.insured.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(user)
+
+    @override_settings(INSURED_PRINCIPAL_CACHE=CACHE_ENABLED)
+    def test_least_recently_used_entry_is_evicted(self):
+        others = [
+            Insured.objects.create(name='Jane', email='jane@example.com', cpf='16899535009'),
+            Insured.objects.create(name='Mary', email='mary@example.com', cpf='11144477735'),
+        ]
+        self._authenticate()
+        for other in others:
+            self._authenticate(other)
+        self.assertEqual(principal_cache.stats()['size'], 2)
+        with self.assertNumQueries(1):
+            self._authenticate()
+
+    @override_settings(
+        INSURED_PRINCIPAL_CACHE={**CACHE_ENABLED, 'BACKEND': 'default'},
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_django_cache_backend(self):
+        self._authenticate()
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate()
+        self.assertEqual(user.pk, self.insured.pk)
+        self.insured.save()
+        with self.assertNumQueries(1):
+            self._authenticate()
+
+    @override_settings(
+        INSURED_PRINCIPAL_CACHE={**CACHE_ENABLED, 'BACKEND': 'default'},
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_password_hash_is_not_cached(self):
+        self.insured.set_password('s3cr3t')
+        self.insured.save()
+        self._authenticate()
+        cached = caches['default'].get(principal_cache.key_prefix + str(self.insured.pk))
+        self.assertIn('password', cached.get_deferred_fields())
+        self.assertNotIn(self.insured.password.encode(), pickle.dumps(cached))
+
+        user, _ = self._authenticate()
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('s3cr3t'))
+
+
+class InsuredLazyJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        revocation_list.configure()
+        revocation_list.refresh()
+        self.insured = Insured(name='John Doe', email='john@example.com', cpf='52998224725')
+        self.insured.set_password('s3cr3t')
+        self.insured.save()
+        self.factory = APIRequestFactory()
+
+    def _authenticate(self, token):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return InsuredLazyJWTAuthentication().authenticate(request)
+
+    def test_pk_is_read_without_query(self):
+        login = InsuredLoginSerializer(data={'email': 'john@example.com', 'password': 's3cr3t'})
+        self.assertTrue(login.is_valid(), login.errors)
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate(login.validated_data['access'])
+            self.assertIsInstance(user, LazyInsured)
+            self.assertTrue(user.is_authenticated)
+            self.assertEqual(user.pk, self.insured.pk)
+
+    def test_edits_are_not_stale(self):
+        user, _ = self._authenticate(RefreshToken.for_user(self.insured).access_token)
+        Insured.objects.filter(pk=self.insured.pk).update(name='John Updated')
+        self.assertEqual(user.name, 'John Updated')
+
+    def test_logout_does_not_load_the_insured(self):
+        refresh = RefreshToken.for_user(self.insured)
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.post('/api/v1/logout/', HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.assertEqual(resp.status_code, 204)
+        self.assertFalse([q for q in queries if 'FROM "core_app_insured"' in q['sql']])
+
+    def test_row_is_loaded_once_on_demand(self):
+        user, _ = self._authenticate(RefreshToken.for_user(self.insured).access_token)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.cpf, '52998224725')
+            self.assertEqual(user.email, 'john@example.com')
+
+    def test_deleted_insured_fails_on_access(self):
+        user, _ = self._authenticate(RefreshToken.for_user(self.insured).access_token)
+        self.insured.delete()
+        with self.assertRaises(AuthenticationFailed):
+            user.cpf
+
+
+def key_ring_settings(active_kid, *keys):
+    return {'ACTIVE_KID': active_kid, 'KEYS': list(keys), 'KEYS_FILE': ''}
+
+
+OLD_KEY = {'kid': 'old', 'algorithm': 'HS256', 'signing_key': 'old-secret'}
+NEW_KEY = {'kid': 'new', 'algorithm': 'HS512', 'signing_key': 'new-secret'}
+
+
+class KeyRingTests(TestCase):
+    def setUp(self):
+        self.insured = Insured.objects.create(name='John Doe', email='john@example.com', cpf='52998224725')
+        self.factory = APIRequestFactory()
+
+    def _authenticate(self, token):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return InsuredJWTAuthentication().authenticate(request)
+
+    def test_issued_tokens_carry_the_active_kid(self):
+        token = str(InsuredRefreshToken.for_user(self.insured).access_token)
+        self.assertEqual(jwt.get_unverified_header(token)['kid'], key_ring.active_key.kid)
+        user, _ = self._authenticate(token)
+        self.assertEqual(user.pk, self.insured.pk)
+
+    def test_tokens_of_the_previous_key_survive_rotation(self):
+        with self.settings(JWT_KEY_RING=key_ring_settings('old', OLD_KEY)):
+            old_token = str(InsuredRefreshToken.for_user(self.insured).access_token)
+        with self.settings(JWT_KEY_RING=key_ring_settings('new', OLD_KEY, NEW_KEY)):
+            new_token = str(InsuredRefreshToken.for_user(self.insured).access_token)
+            self.assertEqual(jwt.get_unverified_header(new_token), {'alg': 'HS512', 'kid': 'new', 'typ': 'JWT'})
+            self.assertEqual(self._authenticate(old_token)[0].pk, self.insured.pk)
+            self.assertEqual(self._authenticate(new_token)[0].pk, self.insured.pk)
+        with self.settings(JWT_KEY_RING=key_ring_settings('new', NEW_KEY)):
+            with self.assertRaises(AuthenticationFailed):
+                self._authenticate(old_token)
+
+    def test_token_signed_with_another_key_is_rejected(self):
+        token = jwt.encode({'user_id': str(self.insured.pk)}, 'other-secret', algorithm='HS256', headers={'kid': 'default'})
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(token)
+
+    def test_only_headers_of_verified_tokens_are_cached(self):
+        key_ring.configure()
+        for i in range(100):
+            token = jwt.encode({'user_id': str(self.insured.pk)}, 'other-secret', algorithm='HS256',
+                               headers={'kid': key_ring.active_key.kid, 'junk': i})
+            with self.assertRaises(AuthenticationFailed):
+                self._authenticate(token)
+        self.assertEqual(key_ring._header_keys, {})
+
+        token = str(InsuredRefreshToken.for_user(self.insured).access_token)
+        self._authenticate(token)
+        self.assertEqual(list(key_ring._header_keys), [token.split('.')[0]])
+
+    @skipUnless(jwt.algorithms.has_crypto, 'cryptography is not installed')
+    def test_asymmetric_key(self):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+
+        private_pem = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+        ).decode()
+        with self.settings(JWT_KEY_RING=key_ring_settings(
+            'ec', OLD_KEY, {'kid': 'ec', 'algorithm': 'ES256', 'signing_key': private_pem},
+        )):
+            token = str(InsuredRefreshToken.for_user(self.insured).access_token)
+            self.assertEqual(jwt.get_unverified_header(token)['alg'], 'ES256')
+            self.assertEqual(self._authenticate(token)[0].pk, self.insured.pk)
@@ -0,0 +1,165 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core_app.models import Insured
+
+LIST_URL = '/api/v1/backoffice/insureds/'
+SEARCH_URL = '/api/v1/backoffice/insureds/search/'
+EXPORT_URL = '/api/v1/backoffice/insureds/export/'
+CPFS = ['52998224725', '16899535009', '11144477735', '39053344705', '86288366757']
+
+
+class InsuredBackofficeListTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.force_authenticate(self.admin)
+        base = timezone.now()
+        for i, cpf in enumerate(CPFS):
+            Insured.objects.create(name=f'User {i}', email=f'user{i}@example.com', cpf=cpf)
+        # Two insureds share created_at, so the cursor must break ties by id.
+        for i, insured in enumerate(Insured.objects.order_by('id')):
+            Insured.objects.filter(pk=insured.pk).update(created_at=base - timedelta(days=min(i, 3)))
+
+    def _pages(self, url):
+        emails = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+            emails += [row['email'] for row in resp.data['results']]
+            url = resp.data['next']
+        return emails
+
+    def test_pages_cover_every_insured_once_newest_first(self):
+        expected = list(Insured.objects.order_by('-created_at', '-id').values_list('email', flat=True))
+        self.assertEqual(self._pages(LIST_URL + '?page_size=2'), expected)
+
+    def test_deep_page_costs_the_same_queries(self):
+        first = self.client.get(LIST_URL + '?page_size=2')
+        second = first.data['next']
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(second)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(resp.data['results']), 2)
+        self.assertNotIn('password', resp.data['results'][0])
+        sql = queries[0]['sql']
+        self.assertNotIn('"password"', sql)
+        # A range bound on created_at, beside the tie-breaking OR.
+        self.assertIn('"created_at" <=', sql)
+
+    def test_filters(self):
+        resp = self.client.get(LIST_URL, {'cpf': '168.995.350-09'})
+        self.assertEqual([row['cpf'] for row in resp.data['results']], ['16899535009'])
+
+        resp = self.client.get(LIST_URL, {'email': 'user4@example.com'})
+        self.assertEqual([row['email'] for row in resp.data['results']], ['user4@example.com'])
+
+        after = (timezone.now() - timedelta(days=1, hours=12)).isoformat()
+        resp = self.client.get(LIST_URL, {'created_after': after})
+        self.assertEqual(len(resp.data['results']), 2)
+
+    def test_invalid_cursor_and_filters(self):
+        self.assertEqual(self.client.get(LIST_URL, {'cursor': 'nope'}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(LIST_URL, {'email': 'nope'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_admin_user(self):
+        self.client.force_authenticate(User.objects.create_user('staffless', password='x'))
+        self.assertEqual(self.client.get(LIST_URL).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(None)
+        self.assertIn(self.client.get(LIST_URL).status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+
+class InsuredBackofficeSearchTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'admin'))
+        for name, cpf in (('Maria da Silva', '52998224725'), ('João Silveira', '52916899535'), ('Ana Souza', '11144477735')):
+            Insured.objects.create(name=name, email=f'{cpf}@example.com', cpf=cpf)
+
+    def _search(self, q):
+        resp = self.client.get(SEARCH_URL, {'q': q})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        return sorted(row['name'] for row in resp.data['results'])
+
+    def test_search_by_name_part(self):
+        self.assertEqual(self._search('silv'), ['João Silveira', 'Maria da Silva'])
+        self.assertEqual(self._search(' SOUZA '), ['Ana Souza'])
+
+    def test_search_by_cpf_prefix(self):
+        self.assertEqual(self._search('529'), ['João Silveira', 'Maria da Silva'])
+        self.assertEqual(self._search('529.982'), ['Maria da Silva'])
+
+    def test_short_name_terms_are_rejected(self):
+        resp = self.client.get(SEARCH_URL, {'q': 'an'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('q', resp.data)
+        self.assertEqual(self.client.get(SEARCH_URL).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class InsuredBackofficeExportTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'admin'))
+        for i, cpf in enumerate(CPFS):
+            Insured.objects.create(name=f'User {i}', email=f'user{i}@example.com', cpf=cpf)
+
+    def _export(self, **params):
+        resp = self.client.get(EXPORT_URL, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        return resp, b''.join(resp.streaming_content)
+
+    def test_ndjson(self):
+        resp, content = self._export()
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([row['cpf'] for row in rows], CPFS)
+        self.assertEqual(set(rows[0]), {'id', 'name', 'email', 'cpf', 'created_at', 'updated_at'})
+        # Same values as the API responses.
+        insured = Insured.objects.get(cpf=CPFS[0])
+        self.assertEqual(rows[0]['updated_at'], self.client.get(LIST_URL).data['results'][-1]['updated_at'])
+        self.assertEqual(rows[0]['id'], insured.pk)
+
+    def test_csv_since(self):
+        Insured.objects.filter(cpf__in=CPFS[:3]).update(updated_at=timezone.now() - timedelta(days=2))
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        resp, content = self._export(type='csv', since=since)
+        self.assertTrue(resp['Content-Type'].startswith('text/csv'))
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual([row['cpf'] for row in rows], CPFS[3:])
+
+    def test_gzip(self):
+        resp = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resp['Vary'])
+        lines = gzip.decompress(b''.join(resp.streaming_content)).splitlines()
+        self.assertEqual(len(lines), len(CPFS))
+
+        for refused in ('gzip;q=0', 'deflate, gzip; q=0.0', 'identity'):
+            with self.subTest(accept_encoding=refused):
+                resp = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING=refused)
+                self.assertFalse(resp.has_header('Content-Encoding'))
+                self.assertEqual(len(b''.join(resp.streaming_content).splitlines()), len(CPFS))
+
+    async def test_asgi_streams_asynchronously(self):
+        await self.async_client.aforce_login(await User.objects.aget(username='admin'))
+        with mock.patch('core_app.views.stream_export', side_effect=AssertionError('read synchronously')):
+            resp = await self.async_client.get(EXPORT_URL)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.is_async)
+        content = b''.join([chunk async for chunk in resp.streaming_content])
+        self.assertEqual([json.loads(line)['cpf'] for line in content.splitlines()], CPFS)
+
+    def test_invalid_parameters_and_access(self):
+        self.assertEqual(self.client.get(EXPORT_URL, {'type': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(EXPORT_URL, {'since': 'nope'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(User.objects.create_user('staffless', password='x'))
+        self.assertEqual(self.client.get(EXPORT_URL).status_code, status.HTTP_403_FORBIDDEN)
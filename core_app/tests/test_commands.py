@@ -0,0 +1,117 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core_app.models import Insured
+
+
+class ImportInsuredsCommandTests(TestCase):
+    def _write(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        self.addCleanup(lambda: os.path.exists(path + '.rejected.ndjson') and os.remove(path + '.rejected.ndjson'))
+        return path
+
+    def _import(self, path, *args):
+        out = StringIO()
+        call_command('import_insureds', path, '--workers', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def _rejected(self, path):
+        with open(path + '.rejected.ndjson', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_import_csv(self):
+        path = self._write('.csv', (
+            "name,email,cpf,password\n"
+            "John Doe,john@example.com,529.982.247-25,s3cr3t\n"
+            "Jane Doe,jane@example.com,16899535009,s3cr3t\n"
+        ))
+        output = self._import(path)
+        self.assertIn('Imported 2 of 2 rows', output)
+        john = Insured.objects.get(email='john@example.com')
+        self.assertEqual(john.cpf, '52998224725')
+        self.assertTrue(john.check_password('s3cr3t'))
+        self.assertEqual(self._rejected(path), [])
+
+    def test_import_ndjson_rejects_invalid_rows(self):
+        path = self._write('.ndjson', '\n'.join([
+            json.dumps({'name': 'John Doe', 'email': 'john@example.com', 'cpf': '52998224725', 'password': 'a'}),
+            json.dumps({'name': 'Bad CPF', 'email': 'bad@example.com', 'cpf': '52998224724', 'password': 'a'}),
+            'not json',
+            json.dumps({'name': 'Dup', 'email': 'john@example.com', 'cpf': '16899535009', 'password': 'a'}),
+        ]))
+        output = self._import(path)
+        self.assertIn('Imported 1 of 4 rows', output)
+        rejected = self._rejected(path)
+        self.assertEqual([r['line'] for r in rejected], [2, 3, 4])
+        self.assertIn('cpf', rejected[0]['errors'])
+        self.assertNotIn('password', rejected[0]['row'])
+        self.assertIn('non_field_errors', rejected[1]['errors'])
+
+    def test_import_upserts_by_email(self):
+        Insured.objects.create(name='Old Name', email='john@example.com', cpf='52998224725')
+        Insured.objects.create(name='Other', email='other@example.com', cpf='16899535009')
+        path = self._write('.csv', (
+            "name,email,cpf,password\n"
+            "New Name,john@example.com,52998224725,s3cr3t\n"
+            "Thief,thief@example.com,16899535009,s3cr3t\n"
+        ))
+        self._import(path)
+        self.assertEqual(Insured.objects.get(email='john@example.com').name, 'New Name')
+        self.assertFalse(Insured.objects.filter(email='thief@example.com').exists())
+        self.assertEqual(self._rejected(path)[0]['errors'], {'cpf': ['CPF already registered to another e-mail.']})
+
+
+class ExportInsuredsCommandTests(TestCase):
+    def setUp(self):
+        for name, email, cpf in (('John Doe', 'john@example.com', '52998224725'),
+                                 ('Jane Doe', 'jane@example.com', '16899535009')):
+            Insured.objects.create(name=name, email=email, cpf=cpf)
+
+    def _export(self, suffix, *args):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        err = StringIO()
+        call_command('export_insureds', '--output', path, '--chunk-size', '1', *args, stderr=err)
+        return path, err.getvalue()
+
+    def test_export_ndjson(self):
+        path, output = self._export('.ndjson')
+        self.assertIn('Exported 2 insureds', output)
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['email'] for row in rows], ['john@example.com', 'jane@example.com'])
+        self.assertNotIn('password', rows[0])
+
+    def test_export_gzipped_csv_since(self):
+        Insured.objects.filter(email='john@example.com').update(updated_at='2020-01-01T00:00:00Z')
+        path, output = self._export('.csv.gz', '--since', '2024-01-01T00:00:00')
+        self.assertIn('Exported 1 insureds', output)
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['email'] for row in rows], ['jane@example.com'])
+
+
+class CalibrateHasherCommandTests(TestCase):
+    def test_recommends_the_largest_iterations_within_budget(self):
+        out = StringIO()
+        call_command('calibrate_hasher', '--iterations', '1000', '2000', '--samples', '1', '--concurrency', '2',
+                     '--budget', '10000', stdout=out)
+        self.assertIn('iterations=1000', out.getvalue())
+        self.assertIn('INSURED_PBKDF2_ITERATIONS=2000', out.getvalue())
+
+    def test_nothing_fits_the_budget(self):
+        out = StringIO()
+        call_command('calibrate_hasher', '--iterations', '100000', '--samples', '1', '--concurrency', '1',
+                     '--budget', '0.001', stdout=out)
+        self.assertIn('No PBKDF2 iteration count tried fits', out.getvalue())
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from setup.handlers import RoutedWSGIHandler, is_api_path
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class RoutedWSGIHandlerTests(SimpleTestCase):
+    def setUp(self):
+        self.handler = RoutedWSGIHandler()
+        self.factory = RequestFactory()
+
+    def _get(self, path):
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        self.handler(self.factory._base_environ(PATH_INFO=path), start_response)
+        return response
+
+    def test_routes(self):
+        self.assertTrue(is_api_path('/api/v1/insureds/me/'))
+        self.assertFalse(is_api_path('/api/v1/backoffice/insureds/'))
+        self.assertFalse(is_api_path('/api/docs/swagger/'))
+        self.assertFalse(is_api_path('/admin/'))
+
+    def test_api_skips_the_full_chain(self):
+        api = self._get('/api/v1/metrics/')
+        self.assertTrue(api['status'].startswith('401'))
+        # Set by SecurityMiddleware, kept; XFrameOptionsMiddleware is not run.
+        self.assertIn('X-Content-Type-Options', api['headers'])
+        self.assertNotIn('X-Frame-Options', api['headers'])
+
+        docs = self._get('/api/docs/swagger/')
+        self.assertTrue(docs['status'].startswith('200'))
+        self.assertIn('X-Frame-Options', docs['headers'])
+
+    def test_full_middleware_setting_is_kept(self):
+        self.assertIn('django.contrib.sessions.middleware.SessionMiddleware', settings.MIDDLEWARE)
@@ -0,0 +1,127 @@
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from core_app.async_views import InsuredAsyncLoginView
+from core_app.hashing import HashingUnavailable, hashing_executor, hashing_limiter
+from core_app.models import Insured
+from core_app.password_upgrade import password_upgrader
+
+ONE_SLOT = {'MAX_WORKERS': 2, 'MAX_CONCURRENCY': 1, 'QUEUE_TIMEOUT': 0.05, 'RETRY_AFTER': 3}
+HASHERS = ['core_app.hashers.InsuredPBKDF2PasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher']
+UPGRADE = {'PBKDF2_ITERATIONS': 1000, 'UPGRADE': True, 'SYNC': True, 'MAX_PENDING': 10}
+
+
+@override_settings(INSURED_HASHING=ONE_SLOT)
+class HashingLimiterTests(TestCase):
+    def setUp(self):
+        hashing_limiter.configure()
+        insured = Insured(name='John Doe', email='john@example.com', cpf='52998224725')
+        insured.set_password('s3cr3t!')
+        insured.save()
+
+    def _login(self):
+        return self.client.post('/api/v1/login/', {'email': 'john@example.com', 'password': 's3cr3t!'},
+                                content_type='application/json')
+
+    def test_login_is_admitted_and_releases_its_slot(self):
+        self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+        self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+        stats = hashing_limiter.stats()
+        self.assertEqual((stats['admitted'], stats['active'], stats['shed']), (2, 0, 0))
+
+    def test_login_is_shed_when_slots_are_busy(self):
+        with hashing_limiter.slot():
+            resp = self._login()
+        self.assertEqual(resp.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(resp['Retry-After'], '3')
+        self.assertEqual(resp.json()['detail'], HashingUnavailable.default_detail)
+        self.assertEqual(hashing_limiter.stats()['shed'], 1)
+        self.assertGreaterEqual(hashing_limiter.stats()['queue_time_seconds_max'], 0.05)
+
+    def test_registration_is_shed_when_slots_are_busy(self):
+        with hashing_limiter.slot():
+            resp = self.client.post('/api/v1/insureds/', {
+                'name': 'Jane Doe', 'email': 'jane@example.com', 'cpf': '16899535009', 'password': 's3cr3t!',
+            }, content_type='application/json')
+        self.assertEqual(resp.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(Insured.objects.filter(email='jane@example.com').exists())
+
+    def test_executor_shares_the_limiter(self):
+        self.assertTrue(async_to_sync(hashing_executor.run)(make_password, 'x'))
+        with hashing_limiter.slot():
+            with self.assertRaises(HashingUnavailable):
+                async_to_sync(hashing_executor.run)(make_password, 'x')
+        self.assertEqual(hashing_executor.stats()['queued'], 0)
+
+    def test_executor_maps_a_batch_with_a_slot_per_item(self):
+        hashes = hashing_executor.map(make_password, ['a', 'b', 'c'])
+        self.assertEqual([check_password(password, encoded) for password, encoded in zip('abc', hashes)], [True] * 3)
+        self.assertEqual(hashing_limiter.stats()['admitted'], 3)
+        with hashing_limiter.slot():
+            with self.assertRaises(HashingUnavailable):
+                hashing_executor.map(make_password, ['a', 'b', 'c'])
+        self.assertEqual(hashing_executor.stats()['queued'], 0)
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS, INSURED_PASSWORD_HASHING=UPGRADE)
+class PasswordUpgradeTests(TestCase):
+    def setUp(self):
+        password_upgrader.configure()
+        self.insured = Insured.objects.create(
+            name='John Doe', email='john@example.com', cpf='52998224725',
+            password=make_password('s3cr3t!', hasher='md5'),
+        )
+
+    def _login(self):
+        return self.client.post('/api/v1/login/', {'email': 'john@example.com', 'password': 's3cr3t!'},
+                                content_type='application/json')
+
+    def _stored(self):
+        self.insured.refresh_from_db()
+        return self.insured.password
+
+    def test_login_upgrades_the_stored_hash(self):
+        updated_at = self.insured.updated_at
+        self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+        self.assertTrue(self._stored().startswith('pbkdf2_sha256$1000$'))
+        self.assertEqual(self.insured.updated_at, updated_at)
+
+        with override_settings(INSURED_PASSWORD_HASHING=dict(UPGRADE, PBKDF2_ITERATIONS=2000)):
+            self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+            self.assertTrue(self._stored().startswith('pbkdf2_sha256$2000$'))
+            self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+            self.assertEqual(password_upgrader.stats()['upgraded'], 1)
+
+    def test_async_login_upgrades_the_stored_hash(self):
+        request = APIRequestFactory().post('/api/v1/login/', {'email': 'john@example.com', 'password': 's3cr3t!'},
+                                           format='json')
+        resp = async_to_sync(InsuredAsyncLoginView.as_view())(request)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(self._stored().startswith('pbkdf2_sha256$1000$'))
+
+    def test_password_changed_meanwhile_is_kept(self):
+        stored = self._stored()
+        password_upgrader.schedule(self.insured.pk, 's3cr3t!', 'md5$stale$hash')
+        self.assertEqual(self._stored(), stored)
+        self.assertEqual(password_upgrader.stats()['skipped'], 1)
+
+    @override_settings(INSURED_PASSWORD_HASHING=dict(UPGRADE, SYNC=False))
+    def test_upgrade_runs_after_the_response(self):
+        stored = self._stored()
+        with mock.patch.object(password_upgrader, '_write') as write:
+            # The lookup and last_login, the password is not written meanwhile.
+            with self.assertNumQueries(2):
+                self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+            deadline = time.monotonic() + 5
+            while password_upgrader.stats()['pending'] and time.monotonic() < deadline:
+                time.sleep(0.01)
+        pk, encoded, upgraded = write.call_args.args
+        self.assertEqual((pk, encoded), (self.insured.pk, stored))
+        self.assertTrue(upgraded.startswith('pbkdf2_sha256$1000$'))
+        self.assertEqual(hashing_limiter.stats()['active'], 0)
@@ -0,0 +1,134 @@
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from core_app.async_views import InsuredAsyncRegistrationView
+from core_app.hashing import HashingUnavailable, hashing_limiter
+from core_app.idempotency import idempotency_store
+from core_app.models import Insured
+from core_app.serializers import InsuredRegistrationSerializer
+
+PAYLOAD = {'name': 'John Doe', 'email': 'john@example.com', 'cpf': '52998224725', 'password': 's3cr3t!'}
+OPTIONS = {'ENABLED': True, 'BACKEND': '', 'TTL': 60, 'MAX_SIZE': 100, 'WAIT_TIMEOUT': 0.2, 'LOCK_TIMEOUT': 60}
+SHARED = dict(OPTIONS, BACKEND='idempotency')
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'idempotency': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'idempotency'},
+}
+DATABASE_CACHES = dict(
+    CACHES, idempotency={'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'insured_idempotency'},
+)
+
+
+@override_settings(INSURED_IDEMPOTENCY=OPTIONS)
+class IdempotentRegistrationTests(TestCase):
+    def setUp(self):
+        idempotency_store.configure()
+
+    def _register(self, key='key-1', **overrides):
+        return self.client.post('/api/v1/insureds/', dict(PAYLOAD, **overrides), content_type='application/json',
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_is_replayed(self):
+        first = self._register()
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        admitted = hashing_limiter.stats()['admitted']
+
+        with self.assertNumQueries(0):
+            retry = self._register()
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(hashing_limiter.stats()['admitted'], admitted)
+        self.assertEqual(Insured.objects.count(), 1)
+
+        # Without the key, or with another one, the registration runs again.
+        self.assertEqual(self._register(key='key-2').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_key_reused_with_another_body(self):
+        self._register()
+        resp = self._register(name='Jane Doe')
+        self.assertEqual(resp.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(idempotency_store.stats()['mismatched'], 1)
+
+    def test_server_errors_are_not_kept(self):
+        with mock.patch.object(hashing_limiter, 'acquire', side_effect=HashingUnavailable(1)):
+            self.assertEqual(self._register().status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        resp = self._register()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Idempotent-Replayed', resp)
+
+    def test_in_flight_duplicate_times_out(self):
+        duplicates = []
+        save = InsuredRegistrationSerializer.save
+
+        def save_after_a_duplicate(serializer, **kwargs):
+            duplicates.append(self._register())
+            return save(serializer, **kwargs)
+
+        with mock.patch.object(InsuredRegistrationSerializer, 'save', save_after_a_duplicate):
+            self.assertEqual(self._register().status_code, status.HTTP_200_OK)
+        self.assertEqual(duplicates[0].status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(duplicates[0]['Retry-After'], '1')
+
+    def test_async_registration(self):
+        factory = APIRequestFactory()
+
+        def register():
+            request = factory.post('/api/v1/insureds/', PAYLOAD, format='json', HTTP_IDEMPOTENCY_KEY='key-1')
+            return async_to_sync(InsuredAsyncRegistrationView.as_view())(request)
+
+        first, retry = register(), register()
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    @override_settings(CACHES=DATABASE_CACHES, INSURED_IDEMPOTENCY=SHARED)
+    def test_async_registration_database_backend(self):
+        call_command('createcachetable', 'insured_idempotency')
+        idempotency_store.configure()
+        self.test_async_registration()
+        self.assertEqual(Insured.objects.count(), 1)
+
+    def test_async_key_too_long(self):
+        request = APIRequestFactory().post('/api/v1/insureds/', PAYLOAD, format='json', HTTP_IDEMPOTENCY_KEY='k' * 300)
+        resp = async_to_sync(InsuredAsyncRegistrationView.as_view())(request)
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Insured.objects.count(), 0)
+
+
+class IdempotencyStoreTests(SimpleTestCase):
+    def _test_duplicate_waits_for_the_first_request(self):
+        idempotency_store.configure()
+        self.assertIsNone(idempotency_store.claim('key', 'body'))
+        results = []
+        duplicate = threading.Thread(target=lambda: results.append(idempotency_store.claim('key', 'body')))
+        duplicate.start()
+        time.sleep(0.1)
+        idempotency_store.complete('key', 'body', (200, 'application/json', b'{}'))
+        duplicate.join()
+        self.assertEqual(results, [{'fingerprint': 'body', 'response': (200, 'application/json', b'{}')}])
+
+        idempotency_store.release('key')
+        self.assertIsNone(idempotency_store.claim('key', 'body'))
+
+    @override_settings(INSURED_IDEMPOTENCY=dict(OPTIONS, WAIT_TIMEOUT=5.0))
+    def test_local(self):
+        self._test_duplicate_waits_for_the_first_request()
+
+    @override_settings(CACHES=CACHES, INSURED_IDEMPOTENCY=dict(SHARED, WAIT_TIMEOUT=5.0))
+    def test_cache_backend(self):
+        self._test_duplicate_waits_for_the_first_request()
+
+    @override_settings(INSURED_IDEMPOTENCY=dict(OPTIONS, MAX_SIZE=2))
+    def test_bounded(self):
+        for key in ('a', 'b', 'c'):
+            idempotency_store.complete(key, 'body', (200, 'application/json', b'{}'))
+        self.assertEqual(idempotency_store.stats()['size'], 2)
+        self.assertIsNone(idempotency_store.claim('a', 'body'))
@@ -1,10 +1,16 @@
+import base64
 import time
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 
 from core_app.models import Insured
+from core_app.revocation import revocation_list
 
 REGISTER_URL = '/api/v1/insureds/'
 LOGIN_URL = '/api/v1/login/'
@@ -12,6 +18,11 @@ EDIT_URL = '/api/v1/insureds/edit/'
 
 
 class InsuredIntegrationTests(APITestCase):
+    def setUp(self):
+        # Loaded now, so that no refresh runs among the counted queries.
+        revocation_list.configure()
+        revocation_list.refresh()
+
     def _register(self, *, name='John Doe', email='john@example.com',
                   cpf='52998224725', password='s3cr3t!'):
         payload = {
@@ -81,6 +92,46 @@ class InsuredIntegrationTests(APITestCase):
         self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('non_field_errors', resp.data)
 
+    def test_edit_writes_only_changed_columns(self):
+        self._register()
+        self._auth(self._login().data['access'])
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.patch(EDIT_URL, {'name': 'Only Name', 'password': '', 'password_confirmation': ''}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        # authentication SELECT + the UPDATE
+        self.assertEqual(len(queries), 2)
+        update = queries[1]['sql']
+        self.assertTrue(update.startswith('UPDATE'))
+        self.assertIn('"name"', update)
+        self.assertIn('"updated_at"', update)
+        for column in ('"email"', '"cpf"', '"password"'):
+            self.assertNotIn(column, update)
+        self.assertEqual(Insured.objects.get(email='john@example.com').name, 'Only Name')
+
+    def test_edit_without_fields_does_not_write(self):
+        self._register()
+        self._auth(self._login().data['access'])
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.patch(EDIT_URL, {'password': '', 'password_confirmation': ''}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(resp.data['name'], 'John Doe')
+
+    @override_settings(INSURED_PRINCIPAL_CACHE={'ENABLED': True, 'MAX_SIZE': 10, 'TTL': 60, 'BACKEND': ''})
+    def test_edit_writes_fields_equal_to_a_stale_principal(self):
+        self._register()
+        self._auth(self._login().data['access'])
+        self.assertEqual(self.client.get('/api/v1/insureds/me/').data['name'], 'John Doe')
+        # Changed by another worker: no post_save reaches this one's cache.
+        Insured.objects.filter(email='john@example.com').update(name='Changed Elsewhere')
+
+        resp = self.client.patch(EDIT_URL, {'name': 'John Doe'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(resp.data['name'], 'John Doe')
+        self.assertEqual(Insured.objects.get(email='john@example.com').name, 'John Doe')
+
     def test_login_sets_last_login(self):
         self._register()
         user = Insured.objects.get(email='john@example.com')
@@ -95,6 +146,18 @@ class InsuredIntegrationTests(APITestCase):
         user = Insured.objects.get(email='john@example.com')
         self.assertEqual(user.cpf, '52998224725')
 
+    def test_masked_cpf_is_accepted_on_register(self):
+        # Up to the 14 characters of a masked CPF, stored as its 11 digits.
+        resp = self._register(cpf='529.982.247-25')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(Insured.objects.get(email='john@example.com').cpf, '52998224725')
+
+        resp = self.client.post(REGISTER_URL, {
+            'name': 'Other', 'email': 'other@example.com', 'cpf': '111.444.777-35--', 'password': 'abcdef',
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data['cpf'], ['Ensure this field has no more than 14 characters.'])
+
     def test_unique_email_violation_on_register(self):
         self._register(email='dup@example.com', cpf='52998224725')
         resp = self.client.post(REGISTER_URL, {
@@ -106,6 +169,40 @@ class InsuredIntegrationTests(APITestCase):
         self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('email', resp.data)
 
+    def test_email_casing_does_not_matter(self):
+        resp = self._register(email='John.Doe@Example.COM')
+        self.assertEqual(resp.data['email'], 'john.doe@example.com')
+
+        resp = self.client.post(LOGIN_URL, {'email': 'JOHN.DOE@example.com', 'password': 's3cr3t!'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(resp.data['email'], 'john.doe@example.com')
+
+        resp = self.client.post(REGISTER_URL, {
+            'name': 'Other', 'email': 'john.doe@EXAMPLE.com', 'cpf': '168.995.350-09', 'password': 'abcdef',
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', resp.data)
+
+    def test_register_is_a_single_insert(self):
+        # savepoint + INSERT + release, the test case runs in a transaction
+        with self.assertNumQueries(3):
+            self._register()
+
+    def test_unique_violations_on_register_report_every_field(self):
+        self._register(email='dup@example.com', cpf='52998224725')
+        resp = self.client.post(REGISTER_URL, {
+            'name': 'Other',
+            'email': 'dup@example.com',
+            'cpf': '529.982.247-25',
+            'password': 'abcdef',
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data, {
+            'email': ['insured with this email already exists.'],
+            'cpf': ['insured with this cpf already exists.'],
+        })
+        self.assertEqual(Insured.objects.count(), 1)
+
     def test_edit_name_only_with_blank_passwords(self):
         self._register()
         token = self._login().data['access']
@@ -123,3 +220,136 @@ class InsuredIntegrationTests(APITestCase):
     def test_schema_endpoint_available(self):
         resp = self.client.get('/api/schema/')
         self.assertIn(resp.status_code, (200, 301, 302))
+
+
+BULK_URL = '/api/v1/insureds/bulk/'
+
+
+class InsuredBulkRegistrationTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+
+    def _row(self, *, name='John Doe', email='john@example.com', cpf='52998224725', password='s3cr3t!'):
+        return {'name': name, 'email': email, 'cpf': cpf, 'password': password}
+
+    def test_bulk_register_creates_valid_rows(self):
+        resp = self.client.post(BULK_URL, {'insureds': [
+            self._row(),
+            self._row(name='Jane Doe', email='jane@example.com', cpf='16899535009'),
+        ]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(len(resp.data['created']), 2)
+        self.assertEqual(resp.data['errors'], [])
+        self.assertNotIn('password', resp.data['created'][0])
+        jane = Insured.objects.get(email='jane@example.com')
+        self.assertEqual(jane.cpf, '16899535009')
+        self.assertTrue(jane.check_password('s3cr3t!'))
+
+    def test_bulk_register_reports_errors_per_row(self):
+        Insured.objects.create(name='Existing', email='taken@example.com', cpf='52998224725')
+        resp = self.client.post(BULK_URL, {'insureds': [
+            self._row(email='taken@example.com', cpf='16899535009'),
+            self._row(email='new@example.com', cpf='52998224724'),
+            self._row(email='ok@example.com', cpf='11144477735'),
+            self._row(email='ok@example.com', cpf='39053344705'),
+        ]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual([c['email'] for c in resp.data['created']], ['ok@example.com'])
+        errors = {e['index']: e['errors'] for e in resp.data['errors']}
+        self.assertEqual(sorted(errors), [0, 1, 3])
+        self.assertIn('email', errors[0])
+        self.assertIn('cpf', errors[1])
+        self.assertEqual(errors[3]['email'], ['Duplicated in this batch.'])
+
+    def test_bulk_register_inserts_in_chunks(self):
+        cpfs = ['52998224725', '16899535009', '11144477735', '39053344705']
+        rows = [self._row(email=f'user{i}@example.com', cpf=cpf) for i, cpf in enumerate(cpfs)]
+        with self.settings(INSURED_BULK_CHUNK_SIZE=2):
+            # 2 uniqueness SELECTs + savepoint/release + 2 chunked INSERTs
+            with self.assertNumQueries(6):
+                resp = self.client.post(BULK_URL, {'insureds': rows}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(Insured.objects.count(), 4)
+
+    def test_bulk_register_requires_a_list(self):
+        resp = self.client.post(BULK_URL, {'insureds': []}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_register_requires_a_partner_or_admin(self):
+        payload = {'insureds': [self._row()]}
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post(BULK_URL, payload, format='json').status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        user = User.objects.create_user('someone', password='x')
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.post(BULK_URL, payload, format='json').status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Insured.objects.count(), 0)
+
+        user.user_permissions.add(Permission.objects.get(codename='add_insured'))
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION='Basic ' + base64.b64encode(b'someone:x').decode())
+        resp = self.client.post(BULK_URL, payload, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(Insured.objects.count(), 1)
+
+
+ME_URL = '/api/v1/insureds/me/'
+
+
+class InsuredMeTests(APITestCase):
+    def setUp(self):
+        insured = Insured(name='John Doe', email='john@example.com', cpf='52998224725')
+        insured.set_password('s3cr3t!')
+        insured.save()
+        resp = self.client.post(LOGIN_URL, {'email': 'john@example.com', 'password': 's3cr3t!'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_get_returns_profile_with_validators(self):
+        resp = self.client.get(ME_URL)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['email'], 'john@example.com')
+        self.assertNotIn('password', resp.data)
+        self.assertTrue(resp['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', resp)
+
+    def test_unchanged_profile_is_not_modified(self):
+        etag = self.client.get(ME_URL)['ETag']
+        resp = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp.content, b'')
+        self.assertEqual(resp['ETag'], etag)
+
+        last_modified = self.client.get(ME_URL)['Last-Modified']
+        resp = self.client.get(ME_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_edit_changes_the_etag(self):
+        etag = self.client.get(ME_URL)['ETag']
+        edit = self.client.patch(EDIT_URL, {'name': 'John Updated'}, format='json')
+        self.assertNotEqual(edit['ETag'], etag)
+        resp = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['name'], 'John Updated')
+        self.assertEqual(resp['ETag'], edit['ETag'])
+
+    def test_edit_with_if_match(self):
+        etag = self.client.get(ME_URL)['ETag']
+        resp = self.client.patch(EDIT_URL, {'name': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+
+        # A second client still holding the first version loses.
+        resp = self.client.patch(EDIT_URL, {'name': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        resp = self.client.patch(EDIT_URL, {'name': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(Insured.objects.get(email='john@example.com').name, 'First')
+
+        resp = self.client.patch(EDIT_URL, {'name': 'Any'}, format='json', HTTP_IF_MATCH='*')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resp = self.client.patch(EDIT_URL, {'name': 'Other'}, format='json', HTTP_IF_MATCH='"999-1"')
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        self.assertIn(self.client.get(ME_URL).status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
@@ -1,7 +1,13 @@
 import time
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
 from django.test import TestCase
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.utils import timezone
 
+from core_app.last_login import LastLoginRecorder
 from core_app.models import Insured
 
 class InsuredModelTests(TestCase):
@@ -32,6 +38,13 @@ class InsuredModelTests(TestCase):
         with self.assertRaises(ValidationError):
             dup.full_clean()
 
+    def test_email_is_unique_in_any_casing(self):
+        self.assertEqual(Insured.objects.normalize_email(' John@Example.COM '), 'john@example.com')
+        self._make_insured(email='unique@example.com')
+        # Written around normalize_email, the functional index refuses it.
+        with self.assertRaises(IntegrityError):
+            Insured.objects.create(email='Unique@example.com', name='Dup', cpf='16899535009')
+
     def test_cpf_unique_validation(self):
         self._make_insured(email='unique@example.com', cpf='52998224725')
         dup = Insured(email='unique2@example.com', name='Dup', cpf='52998224725')
@@ -45,4 +58,54 @@ class InsuredModelTests(TestCase):
         insured.name = 'John Updated'
         insured.save()
         insured.refresh_from_db()
-        self.assertGreaterEqual(insured.updated_at, first_updated)
\ No newline at end of file
+        self.assertGreaterEqual(insured.updated_at, first_updated)
+
+class LastLoginRecorderTests(TestCase):
+    def setUp(self):
+        self.insureds = [
+            Insured.objects.create(email='john@example.com', name='John Doe', cpf='52998224725'),
+            Insured.objects.create(email='jane@example.com', name='Jane Doe', cpf='16899535009'),
+        ]
+        self.recorder = LastLoginRecorder()
+        self.recorder.sync = False
+        self.recorder.max_pending = 10
+        # Keeps the background thread out of the test transaction.
+        self.recorder._thread = object()
+
+    def test_logins_are_coalesced_into_one_update(self):
+        john, jane = self.insureds
+        first = timezone.now()
+        later = first + timedelta(seconds=5)
+        self.recorder.record(john.pk, later)
+        self.recorder.record(john.pk, first)
+        self.recorder.record(jane.pk, first)
+        self.assertEqual(self.recorder.stats()['pending'], 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.recorder.flush(), 2)
+        john.refresh_from_db()
+        jane.refresh_from_db()
+        self.assertEqual(john.last_login, later)
+        self.assertEqual(jane.last_login, first)
+        self.assertEqual(self.recorder.flush(), 0)
+
+    def test_flushes_when_max_pending_is_reached(self):
+        self.recorder.max_pending = 2
+        for insured in self.insureds:
+            self.recorder.record(insured.pk)
+        self.assertEqual(self.recorder.stats(), {'pending': 0, 'flushes': 1, 'written': 2})
+        self.assertFalse(Insured.objects.filter(last_login__isnull=True).exists())
+
+    def test_async_flushes_when_max_pending_is_reached(self):
+        self.recorder.max_pending = 2
+        for insured in self.insureds:
+            async_to_sync(self.recorder.arecord)(insured.pk)
+        self.assertEqual(self.recorder.stats(), {'pending': 0, 'flushes': 1, 'written': 2})
+        self.assertFalse(Insured.objects.filter(last_login__isnull=True).exists())
+
+    def test_sync_mode_writes_right_away(self):
+        self.recorder.sync = True
+        self.recorder.record(self.insureds[0].pk)
+        self.insureds[0].refresh_from_db()
+        self.assertIsNotNone(self.insureds[0].last_login)
+        self.assertEqual(self.recorder.stats()['pending'], 0)
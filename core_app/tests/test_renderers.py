@@ -0,0 +1,71 @@
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+
+from core_app.parsers import FastJSONParser
+from core_app.renderers import FastJSONRenderer
+
+DATA = {
+    'name': 'João Silva',
+    'created_at': datetime(2025, 8, 8, 14, 35, tzinfo=timezone.utc),
+    'amount': Decimal('10.50'),
+    'message': gettext_lazy('Invalid CPF'),
+    'items': [1, 2.5, None, True],
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_render(self):
+        content = FastJSONRenderer().render(DATA, 'application/json')
+        self.assertEqual(json.loads(content), {
+            'name': 'João Silva',
+            'created_at': '2025-08-08T14:35:00Z',
+            'amount': 10.5,
+            'message': 'Invalid CPF',
+            'items': [1, 2.5, None, True],
+        })
+
+    def test_stdlib_fallback_renders_the_same(self):
+        fast = FastJSONRenderer().render(DATA, 'application/json')
+        with mock.patch('core_app.renderers.orjson', None):
+            stdlib = FastJSONRenderer().render(DATA, 'application/json')
+        self.assertEqual(json.loads(fast), json.loads(stdlib))
+
+    def test_line_separators_are_escaped(self):
+        data = {'name': 'a\u2028b\u2029c'}
+        fast = FastJSONRenderer().render(data, 'application/json')
+        with mock.patch('core_app.renderers.orjson', None):
+            stdlib = FastJSONRenderer().render(data, 'application/json')
+        self.assertIn(b'a\\u2028b\\u2029c', fast)
+        self.assertIn(b'a\\u2028b\\u2029c', stdlib)
+        self.assertEqual(json.loads(fast), data)
+
+    def test_non_finite_floats_are_rejected(self):
+        for value in (float('nan'), float('inf'), Decimal('-Infinity')):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                FastJSONRenderer().render({'items': [None, value]}, 'application/json')
+
+    def test_indent_and_empty(self):
+        content = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(content, b'{\n  "a": 1\n}')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def _parse(self, body):
+        return FastJSONParser().parse(io.BytesIO(body), 'application/json', {'encoding': 'utf-8'})
+
+    def test_parse(self):
+        self.assertEqual(self._parse('{"name": "João"}'.encode()), {'name': 'João'})
+        with mock.patch('core_app.parsers.orjson', None):
+            self.assertEqual(self._parse('{"name": "João"}'.encode()), {'name': 'João'})
+
+    def test_parse_error(self):
+        with self.assertRaises(ParseError):
+            self._parse(b'{"name": ')
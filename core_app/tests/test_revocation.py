@@ -0,0 +1,135 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core_app.models import Insured, RevokedToken
+from core_app.revocation import BloomFilter, revocation_list
+from core_app.tokens import ISSUED_AT_CLAIM, InsuredRefreshToken
+
+LOGOUT_URL = '/api/v1/logout/'
+ME_URL = '/api/v1/insureds/me/'
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(capacity=1000, false_positive_rate=0.01)
+        for i in range(1000):
+            bloom.add(f'added-{i}')
+        self.assertTrue(all(f'added-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class RevocationTests(APITestCase):
+    def setUp(self):
+        revocation_list.configure()
+        revocation_list.refresh()
+        self.insured = Insured(name='John Doe', email='john@example.com', cpf='52998224725')
+        self.insured.set_password('s3cr3t!')
+        self.insured.save()
+
+    def _tokens(self, issued_ago=0):
+        refresh = InsuredRefreshToken.for_user(self.insured)
+        refresh['iat'] -= issued_ago
+        refresh[ISSUED_AT_CLAIM] -= issued_ago * 1_000_000
+        access = refresh.access_token
+        access['iat'] -= issued_ago
+        access[ISSUED_AT_CLAIM] -= issued_ago * 1_000_000
+        return str(refresh), str(access)
+
+    def _me(self, access):
+        return self.client.get(ME_URL, HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        refresh, access = self._tokens()
+        other_refresh, other_access = self._tokens()
+
+        resp = self.client.post(LOGOUT_URL, {'refresh': refresh}, format='json', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(RevokedToken.objects.count(), 2)
+
+        resp = self._me(access)
+        self.assertIn(resp.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        self.assertEqual(resp.json()['detail'], 'Token revoked.')
+        # The other session is still valid.
+        self.assertEqual(self._me(other_access).status_code, status.HTTP_200_OK)
+
+    def test_logout_rejects_the_refresh_token_of_another_insured(self):
+        other = Insured.objects.create(name='Jane Doe', email='jane@example.com', cpf='16899535009')
+        _, access = self._tokens()
+        resp = self.client.post(
+            LOGOUT_URL, {'refresh': str(InsuredRefreshToken.for_user(other))}, format='json',
+            HTTP_AUTHORIZATION=f'Bearer {access}',
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(RevokedToken.objects.count(), 0)
+
+    def test_password_change_revokes_earlier_tokens(self):
+        _, access = self._tokens(issued_ago=10)
+        # Issued in the same second as the change, e.g. a stolen token.
+        _, same_second = self._tokens()
+        resp = self.client.patch('/api/v1/insureds/edit/', {
+            'name': 'John Doe', 'password': 'n3w-s3cr3t', 'password_confirmation': 'n3w-s3cr3t',
+        }, format='json', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        self.assertNotEqual(self._me(access).status_code, status.HTTP_200_OK)
+        self.assertNotEqual(self._me(same_second).status_code, status.HTTP_200_OK)
+        # Logins right after the change are not, even in the same second.
+        login = self.client.post('/api/v1/login/', {'email': 'john@example.com', 'password': 'n3w-s3cr3t'},
+                                 format='json')
+        self.assertEqual(self._me(login.data['access']).status_code, status.HTTP_200_OK)
+
+    def test_tokens_without_microsecond_issue_time_fall_back_to_iat(self):
+        _, access = self._tokens()
+        payload = InsuredRefreshToken(access, verify=False).payload
+        del payload[ISSUED_AT_CLAIM]
+        revocation_list.add_insured(self.insured.pk, timezone.now() + timedelta(seconds=1))
+        self.assertTrue(revocation_list.is_revoked(self.insured.pk, payload))
+        payload['iat'] += 2
+        self.assertFalse(revocation_list.is_revoked(self.insured.pk, payload))
+
+    def test_tokens_outside_the_filter_need_no_query(self):
+        refresh, access = self._tokens()
+        payload = InsuredRefreshToken(refresh).payload
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation_list.is_revoked(self.insured.pk, payload))
+        self.assertEqual(self._me(access).status_code, status.HTTP_200_OK)
+
+    @override_settings(INSURED_REVOCATION={
+        'ENABLED': True, 'REFRESH_INTERVAL': 60.0, 'REBUILD_INTERVAL': 3600.0,
+        'CAPACITY': 1000, 'FALSE_POSITIVE_RATE': 0.01,
+    })
+    def test_revocations_of_other_workers_apply_after_a_refresh(self):
+        _, access = self._tokens()
+        self.assertEqual(self._me(access).status_code, status.HTTP_200_OK)
+        # Revoked by another worker, this one only sees it once refreshed.
+        payload = InsuredRefreshToken(access, verify=False).payload
+        RevokedToken.objects.create(
+            insured=self.insured, jti=payload['jti'], expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(self._me(access).status_code, status.HTTP_200_OK)
+        revocation_list.refresh()
+        self.assertNotEqual(self._me(access).status_code, status.HTTP_200_OK)
+        self.assertEqual(revocation_list.stats()['revoked'], 1)
+
+    def test_rebuild_drops_expired_revocations(self):
+        RevokedToken.objects.create(insured=self.insured, jti='expired', expires_at=timezone.now())
+        revocation_list.configure()
+        revocation_list.refresh()
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_admin_action_revokes_every_token(self):
+        _, access = self._tokens(issued_ago=10)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.force_login(admin)
+        resp = self.client.post('/admin/core_app/insured/', {
+            'action': 'revoke_tokens', '_selected_action': [self.insured.pk],
+        })
+        self.assertEqual(resp.status_code, status.HTTP_302_FOUND)
+        self.client.logout()
+        self.assertNotEqual(self._me(access).status_code, status.HTTP_200_OK)
@@ -0,0 +1,71 @@
+import gzip
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from core_app.schema import CachedSpectacularAPIView, schema_cache
+
+
+@override_settings(INSURED_SCHEMA={'CACHED': True, 'FILE': ''})
+class CachedSchemaTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = CachedSpectacularAPIView.as_view()
+
+    def _get(self, **headers):
+        return self.view(self.factory.get('/api/schema/', **headers))
+
+    def test_schema_is_generated_once(self):
+        first = schema_cache.get('json')
+        self._get()
+        self.assertIs(schema_cache.get('json'), first)
+
+    def test_json_and_yaml(self):
+        resp = self._get(HTTP_ACCEPT='application/json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp['Content-Type'], 'application/json')
+        schema = json.loads(resp.content)
+        self.assertIn('/api/v1/insureds/me/', schema['paths'])
+
+        resp = self._get()
+        self.assertEqual(resp['Content-Type'], 'application/vnd.oai.openapi')
+        self.assertTrue(resp.content.startswith(b'openapi:'))
+
+    def test_gzip_variant_and_etags(self):
+        plain = self._get(HTTP_ACCEPT='application/json')
+        compressed = self._get(HTTP_ACCEPT='application/json', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertNotEqual(compressed['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+
+        refused = self._get(HTTP_ACCEPT='application/json', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(refused.has_header('Content-Encoding'))
+
+    def test_security_schemes_are_generated_without_warnings(self):
+        with mock.patch('drf_spectacular.plumbing.warn') as warn:
+            schema = SchemaGenerator().get_schema(request=None, public=True)
+        warn.assert_not_called()
+        self.assertIn('insuredJWT', schema['components']['securitySchemes'])
+        self.assertIn({'insuredLazyJWT': []}, schema['paths']['/api/v1/logout/']['post']['security'])
+
+    def test_if_none_match(self):
+        etag = self._get()['ETag']
+        resp = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp.content, b'')
+
+    def test_read_from_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({'openapi': '3.0.3', 'info': {'title': 'Built', 'version': '1'}, 'paths': {}}, f)
+        self.addCleanup(os.remove, f.name)
+
+        with self.settings(INSURED_SCHEMA={'CACHED': True, 'FILE': f.name}):
+            resp = self._get(HTTP_ACCEPT='application/json')
+        self.assertEqual(json.loads(resp.content)['info']['title'], 'Built')
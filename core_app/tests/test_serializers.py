@@ -1,8 +1,12 @@
+from datetime import datetime, timezone as dt_timezone
+
 from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
 
 from core_app.models import Insured
 from core_app.serializers import (
     InsuredSerializer,
+    InsuredReadSerializer,
     InsuredEditSerializer,
     InsuredLoginSerializer,
 )
@@ -53,6 +57,41 @@ class InsuredSerializerTests(TestCase):
         self.assertNotIn("password", rep)
 
 
+class InsuredReadSerializerTests(TestCase):
+    def setUp(self):
+        self.insureds = [
+            Insured(
+                pk=1, name="João", email="joao@example.com", cpf="52998224725",
+                created_at=datetime(2025, 8, 8, 14, 35, 1, 123456, tzinfo=dt_timezone.utc), updated_at=None,
+            ),
+            Insured(
+                pk=2, name="Maria", email="maria@example.com", cpf="11144477735",
+                created_at=datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+                updated_at=datetime(2025, 2, 3, 4, 5, 6, tzinfo=dt_timezone.utc),
+            ),
+        ]
+
+    def test_same_representation_as_insured_serializer(self):
+        for insured in self.insureds:
+            self.assertEqual(InsuredReadSerializer(insured).data, InsuredSerializer(insured).data)
+        self.assertEqual(
+            InsuredReadSerializer(self.insureds, many=True).data,
+            InsuredSerializer(self.insureds, many=True).data,
+        )
+        with timezone.override("America/Sao_Paulo"):
+            self.assertEqual(InsuredReadSerializer(self.insureds[1]).data, InsuredSerializer(self.insureds[1]).data)
+
+    def test_values_rows(self):
+        for insured in self.insureds:
+            insured.password = "!"
+        Insured.objects.bulk_create(self.insureds)
+        rows = Insured.objects.order_by("pk").values()
+        self.assertEqual(
+            InsuredReadSerializer(rows, many=True).data,
+            InsuredSerializer(Insured.objects.order_by("pk"), many=True).data,
+        )
+
+
 class InsuredEditSerializerTests(SimpleTestCase):
     def test_update_name_only_with_blank_passwords(self):
         data = {
@@ -1,7 +1,18 @@
+import random
+import subprocess
+import sys
+
 from django.test import SimpleTestCase, TestCase
 from django.core.exceptions import ValidationError
 
-from core_app.validators import validate_cpf
+from core_app.validators import (
+    validate_cpf,
+    validate_cpf_batch,
+    CPF_VALID,
+    CPF_INVALID_LENGTH,
+    CPF_REPEATED_DIGITS,
+    CPF_INVALID_CHECK_DIGITS,
+)
 
 
 class ValidateCPFTests(SimpleTestCase):
@@ -30,4 +41,43 @@ class ValidateCPFTests(SimpleTestCase):
         with self.assertRaises(ValidationError):
             validate_cpf('')
         with self.assertRaises(ValidationError):
-            validate_cpf(None)
\ No newline at end of file
+            validate_cpf(None)
+
+class ValidateCPFBatchTests(SimpleTestCase):
+    def test_reason_codes(self):
+        mask, reasons = validate_cpf_batch([
+            '52998224725', '529.982.247-25', '1234567890', '11111111111', '52998224724', None, '',
+        ])
+        self.assertEqual(mask.tolist(), [True, True, False, False, False, False, False])
+        self.assertEqual(reasons.tolist(), [
+            CPF_VALID, CPF_VALID, CPF_INVALID_LENGTH, CPF_REPEATED_DIGITS,
+            CPF_INVALID_CHECK_DIGITS, CPF_INVALID_LENGTH, CPF_INVALID_LENGTH,
+        ])
+
+    def test_empty_batch(self):
+        mask, reasons = validate_cpf_batch([])
+        self.assertEqual(mask.tolist(), [])
+        self.assertEqual(reasons.tolist(), [])
+
+    def test_matches_scalar_validator(self):
+        rng = random.Random(42)
+        values = [''.join(rng.choice('0123456789') for _ in range(11)) for _ in range(2000)]
+        values += ['16899535009', '168.995.350-09', '١٦٨٩٩٥٣٥٠٠٩', '١٦٨٩٩٥٣٥٠09', '00000000000', '0' * 12]
+        mask, _ = validate_cpf_batch(values)
+        for value, valid in zip(values, mask):
+            try:
+                validate_cpf(value)
+                expected = True
+            except ValidationError:
+                expected = False
+            self.assertEqual(bool(valid), expected, value)
+
+    def test_numpy_is_loaded_by_the_batch_only(self):
+        code = (
+            'import sys, django; django.setup(); import core_app.models, core_app.urls; '
+            'loaded = "numpy" in sys.modules; '
+            'from core_app.validators import validate_cpf_batch; validate_cpf_batch(["52998224725"]); '
+            'print(loaded, "numpy" in sys.modules)'
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ['False', 'True'])
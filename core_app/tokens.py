@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .keyring import token_backend
+
+# Issue time of the tokens in microseconds since the epoch: `iat` only has
+# seconds, too coarse to tell the tokens issued right before a revocation of
+# every token of an Insured from those issued right after.
+ISSUED_AT_CLAIM = 'iat_us'
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def epoch_microseconds(at_time):
+    return (at_time - EPOCH) // timedelta(microseconds=1)
+
+
+def issued_at(payload):
+    """
+    When the token of `payload` was issued, in microseconds since the epoch.
+    Tokens issued before ISSUED_AT_CLAIM existed fall back to `iat`.
+    """
+    value = payload.get(ISSUED_AT_CLAIM)
+    if value is None:
+        return payload.get('iat', 0) * 1_000_000
+    return value
+
+
+class IssuedAtMixin:
+    def set_iat(self, claim='iat', at_time=None):
+        super().set_iat(claim, at_time)
+        if claim == 'iat':
+            self.payload[ISSUED_AT_CLAIM] = epoch_microseconds(at_time or self.current_time)
+
+
+class InsuredAccessToken(IssuedAtMixin, AccessToken):
+    _token_backend = token_backend
+
+
+class InsuredRefreshToken(IssuedAtMixin, RefreshToken):
+    _token_backend = token_backend
+    access_token_class = InsuredAccessToken
+    # The access token has an issue time of its own, like `iat`.
+    no_copy_claims = RefreshToken.no_copy_claims + (ISSUED_AT_CLAIM,)
@@ -1,13 +1,38 @@
+from django.conf import settings
 from django.urls import path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
-from . import views
+from . import async_views, views
+from .schema import CachedSpectacularAPIView
+
+if settings.INSURED_ASYNC_VIEWS:
+    registration_view = async_views.InsuredAsyncRegistrationView
+    login_view = async_views.InsuredAsyncLoginView
+    edit_view = async_views.InsuredAsyncEditView
+    me_view = async_views.InsuredAsyncMeView
+else:
+    registration_view = views.InsuredRegistrationView
+    login_view = views.InsuredLoginView
+    edit_view = views.InsuredEditView
+    me_view = views.InsuredMeView
+
+if settings.INSURED_SCHEMA['CACHED']:
+    schema_view = CachedSpectacularAPIView
+else:
+    schema_view = SpectacularAPIView
 
 urlpatterns = [
-    path('api/v1/insureds/', views.InsuredRegistrationView.as_view()),
-    path('api/v1/insureds/edit/', views.InsuredEditView.as_view()),
-    path('api/v1/login/', views.InsuredLoginView.as_view()),
+    path('api/v1/insureds/', registration_view.as_view()),
+    path('api/v1/insureds/bulk/', views.InsuredBulkRegistrationView.as_view()),
+    path('api/v1/insureds/edit/', edit_view.as_view()),
+    path('api/v1/insureds/me/', me_view.as_view()),
+    path('api/v1/login/', login_view.as_view()),
+    path('api/v1/logout/', views.InsuredLogoutView.as_view()),
+    path('api/v1/backoffice/insureds/', views.InsuredBackofficeListView.as_view()),
+    path('api/v1/backoffice/insureds/search/', views.InsuredBackofficeSearchView.as_view()),
+    path('api/v1/backoffice/insureds/export/', views.InsuredBackofficeExportView.as_view()),
+    path('api/v1/metrics/', views.MetricsView.as_view()),
 
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', schema_view.as_view(), name='schema'),
 
     path('api/docs/swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
 
@@ -1,19 +1,32 @@
 import re
+
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
+CPF_VALID = 0
+CPF_INVALID_LENGTH = 1
+CPF_REPEATED_DIGITS = 2
+CPF_INVALID_CHECK_DIGITS = 3
+
+CPF_ERROR_MESSAGES = {
+    CPF_INVALID_LENGTH: _('CPF needs to have 11 characters'),
+    CPF_REPEATED_DIGITS: _('Invalid CPF'),
+    CPF_INVALID_CHECK_DIGITS: _('Invalid CPF'),
+}
+
+
 def validate_cpf(value: str):
     """
     Checks if a cpf is valid
-    
+
     Args:
       value:str cpf to be evaluated
     """
     digits = re.sub(r'\D', '', value or '')
     if len(digits) != 11:
-        raise ValidationError(_('CPF needs to have 11 characters'))
+        raise ValidationError(CPF_ERROR_MESSAGES[CPF_INVALID_LENGTH])
     if digits == digits[0] * 11:
-        raise ValidationError(_('Invalid CPF'))
+        raise ValidationError(CPF_ERROR_MESSAGES[CPF_REPEATED_DIGITS])
 
     def calc_dv(nums: str, start_weight: int) -> str:
         s = sum(int(n) * w for n, w in zip(nums, range(start_weight, 1, -1)))
@@ -24,4 +37,56 @@ def validate_cpf(value: str):
     dv2 = calc_dv(digits[:9] + dv1, 11)
 
     if digits[-2:] != dv1 + dv2:
-        raise ValidationError(_('Invalid CPF'))
\ No newline at end of file
+        raise ValidationError(CPF_ERROR_MESSAGES[CPF_INVALID_CHECK_DIGITS])
+
+
+def validate_cpf_batch(values):
+    """
+    Checks a batch of cpfs at once, following the same rules as validate_cpf
+
+    Args:
+      values: iterable of cpfs to be evaluated
+
+    Returns:
+      (mask, reasons): a boolean array, True where the cpf is valid, and an
+      array with the CPF_* reason code of each cpf.
+    """
+    # Imported here, so that numpy is only loaded by the processes importing
+    # in bulk, not by every worker importing the models.
+    import numpy as np
+
+    normalized = [
+        value if isinstance(value, str) and value.isascii() and value.isdigit() else re.sub(r'\D', '', value or '')
+        for value in values
+    ]
+    reasons = np.full(len(normalized), CPF_VALID, dtype=np.uint8)
+
+    lengths = np.fromiter(map(len, normalized), dtype=np.intp, count=len(normalized))
+    reasons[lengths != 11] = CPF_INVALID_LENGTH
+    positions = np.flatnonzero(lengths == 11)
+    if not positions.size:
+        return reasons == CPF_VALID, reasons
+
+    candidates = [normalized[i] for i in positions]
+    joined = ''.join(candidates)
+    if joined.isascii():
+        digits = np.frombuffer(joined.encode('ascii'), dtype=np.uint8).reshape(-1, 11).astype(np.intp) - 48
+        repeated = (digits == digits[:, :1]).all(axis=1)
+        ascii_dv = np.ones(len(candidates), dtype=bool)
+    else:
+        # \d also matches non-ASCII digits. validate_cpf compares them as
+        # characters, so the slow path mirrors that comparison.
+        digits = np.array([[int(c) for c in cpf] for cpf in candidates], dtype=np.intp)
+        repeated = np.array([cpf == cpf[0] * 11 for cpf in candidates])
+        ascii_dv = np.array([cpf[-2:].isascii() for cpf in candidates])
+
+    r1 = digits[:, :9] @ np.arange(10, 1, -1) % 11
+    dv1 = np.where(r1 < 2, 0, 11 - r1)
+    r2 = (digits[:, :9] @ np.arange(11, 2, -1) + dv1 * 2) % 11
+    dv2 = np.where(r2 < 2, 0, 11 - r2)
+    invalid_dv = (digits[:, 9] != dv1) | (digits[:, 10] != dv2) | ~ascii_dv
+
+    reasons[positions] = np.where(
+        repeated, CPF_REPEATED_DIGITS, np.where(invalid_dv, CPF_INVALID_CHECK_DIGITS, CPF_VALID)
+    )
+    return reasons == CPF_VALID, reasons
@@ -1,16 +1,58 @@
-from django.utils.timezone import now
-
-from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter, OpenApiResponse
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions
+from rest_framework import generics, status, permissions
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.timezone import now
 
-from .serializers import InsuredSerializer, InsuredLoginSerializer, InsuredEditSerializer
+from .serializers import (
+    InsuredSerializer,
+    InsuredReadSerializer,
+    InsuredRegistrationSerializer,
+    InsuredLoginSerializer,
+    InsuredLogoutSerializer,
+    InsuredEditSerializer,
+    InsuredBulkSerializer,
+    InsuredListFilterSerializer,
+    InsuredSearchSerializer,
+    InsuredExportFilterSerializer,
+)
+from . import metrics
+from .cache import principal_cache
+from .conditional import get_validator_headers, get_version, parse_if_match
+from .export import CONTENT_TYPES, astream_export, export_records, stream_export
+from .hashing import HashingConcurrencyLimitMixin
+from .idempotency import IdempotencyMixin
+from .last_login import last_login_recorder
 from .models import Insured
-from .auth import InsuredJWTAuthentication
+from .pagination import KeysetPagination
+from .revocation import revoke_insured_tokens, revoke_token
+from .schema import accepted_codings
+from .auth import InsuredJWTAuthentication, InsuredLazyJWTAuthentication
+
+EXPORT_DESCRIPTION = "One insured per line, after a header line in CSV"
 
+PRECONDITION_FAILED = {'detail': 'The insured was changed meanwhile, fetch it again.'}
 
-class InsuredLoginView(APIView):
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    'Idempotency-Key', str, OpenApiParameter.HEADER,
+    description=(
+        "Unique value (e.g. a UUID) of this request, at most 255 characters. Retries sent with the same key "
+        "and body get the first response, with `Idempotent-Replayed: true`, instead of registering again."
+    ),
+)
+IDEMPOTENCY_RESPONSES = {
+    409: OpenApiResponse(description="A request with this `Idempotency-Key` is still in progress, retry later"),
+    422: OpenApiResponse(description="This `Idempotency-Key` was already used with a different body"),
+}
+
+
+class InsuredLoginView(HashingConcurrencyLimitMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
     @extend_schema(
@@ -21,6 +63,7 @@ class InsuredLoginView(APIView):
         request=InsuredLoginSerializer,
         responses={
             200: InsuredLoginSerializer,
+            503: OpenApiResponse(description="Too many logins and registrations in progress, retry after `Retry-After` seconds"),
         },
         examples=[
             OpenApiExample(
@@ -51,14 +94,12 @@ class InsuredLoginView(APIView):
     def post(self, request):
         serializer = InsuredLoginSerializer(data=request.data)
         if serializer.is_valid():
-            insured = serializer.validated_data['insured']
-            insured.last_login = now()
-            insured.save(update_fields=['last_login'])
-            del serializer.validated_data['insured']
+            insured = serializer.validated_data.pop('insured')
+            last_login_recorder.record(insured.pk)
             return Response(serializer.validated_data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class InsuredRegistrationView(APIView):
+class InsuredRegistrationView(IdempotencyMixin, HashingConcurrencyLimitMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
     @extend_schema(
@@ -75,8 +116,11 @@ class InsuredRegistrationView(APIView):
             "The field `password` is write only and will be not be sent as response."
         ),
         request=InsuredSerializer,
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             200: InsuredSerializer,
+            **IDEMPOTENCY_RESPONSES,
+            503: OpenApiResponse(description="Too many logins and registrations in progress, retry after `Retry-After` seconds"),
         },
         examples=[
             OpenApiExample(
@@ -110,14 +154,182 @@ class InsuredRegistrationView(APIView):
         ]
     )
     def post(self, request):
-        serializer = InsuredSerializer(data=request.data)
+        serializer = InsuredRegistrationSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            insured = serializer.save()
+            return Response(InsuredReadSerializer(insured).data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class InsuredEditView(APIView):
+class IsPartnerOrAdminUser(permissions.BasePermission):
+    """
+    Django admin users, and partner accounts: Django users granted the
+    core_app.add_insured permission.
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_staff or user.has_perm('core_app.add_insured')))
+
+
+class InsuredBulkRegistrationView(IdempotencyMixin, APIView):
+    # Partners call it from their systems, with basic authentication. The
+    # passwords are hashed on the hashing pool, each taking a hashing slot.
+    authentication_classes = [BasicAuthentication]
+    permission_classes = [IsPartnerOrAdminUser]
+
+    @extend_schema(
+        tags=["Insured"],
+        summary="Insured Bulk Registration",
+        description=(
+            "Register a batch of Insureds in a single request, for partners and admin users "
+            "(basic authentication).\n\n"
+            "Each item of `insureds` accepts the same fields as the single registration. "
+            "The batch is validated as a whole: e-mails and CPFs already registered or "
+            "repeated inside the batch are reported per row, and the valid rows are "
+            "inserted in chunks.\n\n"
+            "Rows with errors are listed in `errors` by their position in the batch and "
+            "do not prevent the valid rows from being registered."
+        ),
+        request=InsuredBulkSerializer,
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
+        responses={
+            200: OpenApiResponse(description="Registered insureds and the errors per row"),
+            400: OpenApiResponse(description="Validation error"),
+            401: OpenApiResponse(description="Not authenticated"),
+            403: OpenApiResponse(description="Not a partner or admin user"),
+            **IDEMPOTENCY_RESPONSES,
+            503: OpenApiResponse(description="Too many logins and registrations in progress, retry after `Retry-After` seconds"),
+        },
+        examples=[
+            OpenApiExample(
+                "Request example",
+                value={
+                    "insureds": [
+                        {
+                            "name": "João Silva",
+                            "email": "joao.silva@example.com",
+                            "cpf": "52998224725",
+                            "password": "safePassword123"
+                        },
+                        {
+                            "name": "Maria Souza",
+                            "email": "joao.silva@example.com",
+                            "cpf": "16899535009",
+                            "password": "safePassword123"
+                        }
+                    ]
+                },
+                request_only=True
+            ),
+            OpenApiExample(
+                "Response Example",
+                value={
+                    "created": [
+                        {
+                            "name": "João Silva",
+                            "email": "joao.silva@example.com",
+                            "cpf": "52998224725",
+                            "created_at": "2025-08-08T14:35:00Z",
+                            "updated_at": "2025-08-08T14:35:00Z"
+                        }
+                    ],
+                    "errors": [
+                        {"index": 1, "errors": {"email": ["Duplicated in this batch."]}}
+                    ]
+                },
+                response_only=True
+            ),
+        ]
+    )
+    def post(self, request):
+        serializer = InsuredBulkSerializer(data=request.data)
+        if serializer.is_valid():
+            insureds = serializer.save()
+            return Response({
+                'created': InsuredReadSerializer(insureds, many=True).data,
+                'errors': serializer.validated_data['errors'],
+            }, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class InsuredLogoutView(APIView):
+    # Only needs the pk of the Insured, which is not loaded.
+    authentication_classes = [InsuredLazyJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        tags=["Authentication"],
+        summary="Logout of the Insured",
+        description=(
+            "Revokes the access token of the request and, when sent, its refresh token, "
+            "before they expire. Changing the password revokes every token of the insured."
+        ),
+        request=InsuredLogoutSerializer,
+        responses={
+            204: OpenApiResponse(description="Tokens revoked"),
+            400: OpenApiResponse(description="Invalid refresh token"),
+        },
+    )
+    def post(self, request):
+        serializer = InsuredLogoutSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        refresh = serializer.validated_data.get('refresh')
+        if refresh is not None and str(refresh.get('user_id')) != str(request.user.pk):
+            return Response({'refresh': ['Invalid or expired refresh token.']}, status=status.HTTP_400_BAD_REQUEST)
+        revoke_token(request.auth)
+        if refresh is not None:
+            revoke_token(refresh)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class InsuredEditMixin:
+    """
+    Edit of the authenticated Insured shared by InsuredEditView and
+    InsuredAsyncEditView, which only differ in how they hash the password.
+    """
+    def edit(self, request, changes):
+        """
+        Writes the `changes` sent by the client (a hashed `password`
+        included) in one UPDATE of those columns, failing with 412 when the
+        If-Match header names another version, and returns the response.
+
+        Every field sent is written, even when it matches the authenticated
+        Insured: that one may come from the principal cache and miss changes
+        made by other workers. Concurrent edits are detected with If-Match.
+        """
+        # The authenticated Insured, no need to load it again.
+        insured = request.user
+        versions = parse_if_match(request.headers.get('If-Match'), insured)
+
+        if changes:
+            changes['updated_at'] = now()
+            queryset = Insured.objects.filter(pk=insured.pk)
+            if versions is not None:
+                # The version is checked by the UPDATE itself, no row lock.
+                queryset = queryset.filter(updated_at__in=versions)
+            # Writes only the changed columns, in one UPDATE.
+            if not queryset.update(**changes):
+                if versions is not None:
+                    return Response(PRECONDITION_FAILED, status=status.HTTP_412_PRECONDITION_FAILED)
+                return Response({'detail': 'Insured not found.'}, status=status.HTTP_401_UNAUTHORIZED)
+            # update() sends no post_save, drop the cached principal here.
+            principal_cache.delete(insured.pk)
+            if 'password' in changes:
+                # Logs every session out, this one included.
+                revoke_insured_tokens(insured.pk)
+            for attr, value in changes.items():
+                setattr(insured, attr, value)
+        elif versions is not None and get_version(insured) not in versions:
+            return Response(PRECONDITION_FAILED, status=status.HTTP_412_PRECONDITION_FAILED)
+        return Response(
+            InsuredReadSerializer(insured).data,
+            status=status.HTTP_200_OK,
+            headers=get_validator_headers(insured),
+        )
+
+
+class InsuredEditView(InsuredEditMixin, APIView):
     authentication_classes = [InsuredJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
@@ -133,9 +345,16 @@ class InsuredEditView(APIView):
             "- If you send empty strings for the password fields, the password is ignored."
         ),
         request=InsuredEditSerializer,
+        parameters=[
+            OpenApiParameter(
+                'If-Match', str, OpenApiParameter.HEADER,
+                description="ETag of the profile being edited, to fail with 412 if it was changed meanwhile.",
+            ),
+        ],
         responses={
             200: OpenApiResponse(response=InsuredSerializer, description="Updated insured profile"),
             400: OpenApiResponse(description="Validation error"),
+            412: OpenApiResponse(description="The profile was changed since the `If-Match` ETag"),
         },
         examples=[
             OpenApiExample(
@@ -176,14 +395,176 @@ class InsuredEditView(APIView):
     def patch(self, request):
         serializer = InsuredEditSerializer(data=request.data, partial=True)
         if serializer.is_valid():
-            insured = Insured.objects.filter(pk=request.user.pk).first()
-            if not insured:
-                return Response(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
-            password = serializer.validated_data.pop('password', None)
-            for attr, value in serializer.validated_data.items():
-                setattr(insured, attr, value)
+            changes = dict(serializer.validated_data)
+            password = changes.pop('password', None)
             if password:
-                insured.set_password(password)
-            insured.save()
-            return Response(InsuredSerializer(insured).data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+                changes['password'] = make_password(password)
+            return self.edit(request, changes)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class InsuredProfileMixin:
+    """
+    Profile of the authenticated Insured shared by InsuredMeView and
+    InsuredAsyncMeView, answered without database access.
+    """
+    def get_profile(self, request):
+        insured = request.user
+        headers = get_validator_headers(insured)
+        # Answered from the authenticated Insured, without serializing it.
+        response = get_conditional_response(
+            request,
+            etag=headers['ETag'],
+            last_modified=int(get_version(insured).timestamp()),
+        )
+        if response is None:
+            response = Response(InsuredReadSerializer(insured).data, status=status.HTTP_200_OK)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+
+class InsuredMeView(InsuredProfileMixin, APIView):
+    authentication_classes = [InsuredJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        tags=["Insured"],
+        summary="Profile of the authenticated insured",
+        description=(
+            "Returns the profile of the authenticated insured with its `ETag` and `Last-Modified`.\n\n"
+            "Send them back in `If-None-Match` / `If-Modified-Since` to get **304 Not Modified**, "
+            "with no body, while the profile is unchanged. The `ETag` can also be sent in `If-Match` "
+            "when editing the profile, which then fails with **412** if it was changed meanwhile."
+        ),
+        parameters=[
+            OpenApiParameter('If-None-Match', str, OpenApiParameter.HEADER, description="ETag of the cached profile."),
+            OpenApiParameter('If-Modified-Since', str, OpenApiParameter.HEADER, description="Last-Modified of the cached profile."),
+        ],
+        responses={
+            200: InsuredSerializer,
+            304: OpenApiResponse(description="The profile did not change"),
+        },
+    )
+    def get(self, request):
+        return self.get_profile(request)
+
+
+class InsuredBackofficeListView(generics.ListAPIView):
+    """
+    Read-only listing of Insureds for back-office tools, for Django admin
+    users (session or basic authentication).
+    """
+    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+    serializer_class = InsuredReadSerializer
+    pagination_class = KeysetPagination
+
+    @extend_schema(
+        tags=["Back-office"],
+        summary="List insureds",
+        description=(
+            "Lists the insureds, newest first.\n\n"
+            "Pages are linked by an opaque cursor: follow the `next` link until it is `null`. "
+            "Fetching a page costs the same no matter how deep it is, and no total is computed."
+        ),
+        parameters=[InsuredListFilterSerializer],
+        responses=InsuredSerializer(many=True),
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        filters = InsuredListFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        # The hash is never listed, so it is not read either.
+        return filters.filter(Insured.objects.defer('password'))
+
+
+class InsuredBackofficeSearchView(InsuredBackofficeListView):
+    """
+    Looks Insureds up by the beginning of their CPF or part of their name,
+    for the call centre.
+    """
+    @extend_schema(
+        tags=["Back-office"],
+        summary="Search insureds",
+        description=(
+            "Searches the insureds by the beginning of their CPF (when `q` only has digits, "
+            "masked or not) or by part of their name (at least 3 characters, case insensitive), "
+            "newest first.\n\n"
+            "Pages are linked like the listing: follow the `next` link until it is `null`."
+        ),
+        parameters=[InsuredSearchSerializer],
+        responses=InsuredSerializer(many=True),
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        search = InsuredSearchSerializer(data=self.request.query_params)
+        search.is_valid(raise_exception=True)
+        return search.filter(Insured.objects.defer('password'))
+
+
+class InsuredBackofficeExportView(APIView):
+    """
+    Full or incremental extract of the Insureds for reporting, streamed as
+    NDJSON or CSV rows as they are read, so the memory used does not depend
+    on the size of the table, under WSGI and ASGI. Gzipped on the fly for
+    clients accepting it.
+    """
+    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+    # Rows fetched per round trip of the server-side cursor.
+    chunk_size = 2000
+
+    @extend_schema(
+        tags=["Back-office"],
+        summary="Export insureds",
+        description=(
+            "Streams every insured, in id order, as NDJSON (one JSON object per line) or as CSV with a header.\n\n"
+            "For incremental extracts, pass the moment the previous extract started in `since`: only the "
+            "insureds updated at or after it are exported. The body is gzipped when the request sends "
+            "`Accept-Encoding: gzip`."
+        ),
+        parameters=[InsuredExportFilterSerializer],
+        responses={
+            (200, CONTENT_TYPES['ndjson']): OpenApiResponse(OpenApiTypes.STR, description=EXPORT_DESCRIPTION),
+            (200, 'text/csv'): OpenApiResponse(OpenApiTypes.STR, description=EXPORT_DESCRIPTION),
+        },
+    )
+    def get(self, request):
+        filters = InsuredExportFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        file_format = filters.validated_data['type']
+        codings = accepted_codings(request.headers.get('Accept-Encoding', ''))
+        compress = 'gzip' in codings or '*' in codings
+
+        records = export_records(filters.validated_data.get('since'), chunk_size=self.chunk_size)
+        # ASGI servers need an async iterator to stream the rows as they are read.
+        stream = astream_export if isinstance(request._request, ASGIRequest) else stream_export
+        response = StreamingHttpResponse(
+            stream(records, file_format, compress=compress),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="insureds.{file_format}"'
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+
+class MetricsView(APIView):
+    """
+    Process counters for monitoring: hashing pool queue depth, principal
+    cache hits and misses. Each worker process reports its own values.
+    For Django admin users, with basic authentication (no sessions on the
+    API middleware chain).
+    """
+    authentication_classes = [BasicAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(exclude=True)
+    def get(self, request):
+        return Response(metrics.collect(), status=status.HTTP_200_OK)
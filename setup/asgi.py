@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from setup.handlers import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'setup.settings')
 
 application = get_asgi_application()
+
+# Builds the cached OpenAPI document before serving the first request.
+from core_app.schema import schema_cache  # noqa: E402
+
+if schema_cache.enabled:
+    schema_cache.load()
@@ -0,0 +1,77 @@
+"""
+WSGI/ASGI applications sending the stateless API through a short middleware
+chain.
+
+Requests whose path starts with one of API_MIDDLEWARE_ROUTES['INCLUDE'] (and
+none of 'EXCLUDE') are handled with API_MIDDLEWARE, the others (admin,
+back-office, docs) with the full MIDDLEWARE. The API authenticates by JWT in
+its views, so it has no use for sessions, CSRF, messages or the
+authentication middleware.
+"""
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+
+
+def is_api_path(path):
+    routes = settings.API_MIDDLEWARE_ROUTES
+    return (
+        path.startswith(tuple(routes['INCLUDE']))
+        and not path.startswith(tuple(routes['EXCLUDE']))
+    )
+
+
+class APIMiddlewareMixin:
+    def load_middleware(self, is_async=False):
+        # BaseHandler reads settings.MIDDLEWARE; swapped only while the chain
+        # is built, once at startup.
+        middleware = settings.MIDDLEWARE
+        settings.MIDDLEWARE = settings.API_MIDDLEWARE
+        try:
+            super().load_middleware(is_async=is_async)
+        finally:
+            settings.MIDDLEWARE = middleware
+
+
+class APIWSGIHandler(APIMiddlewareMixin, WSGIHandler):
+    pass
+
+
+class APIASGIHandler(APIMiddlewareMixin, ASGIHandler):
+    pass
+
+
+class RoutedWSGIHandler:
+    def __init__(self):
+        self.api = APIWSGIHandler()
+        self.full = WSGIHandler()
+
+    def __call__(self, environ, start_response):
+        handler = self.api if is_api_path(environ.get('PATH_INFO', '')) else self.full
+        return handler(environ, start_response)
+
+
+class RoutedASGIHandler:
+    def __init__(self):
+        self.api = APIASGIHandler()
+        self.full = ASGIHandler()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and is_api_path(scope['path']):
+            return await self.api(scope, receive, send)
+        return await self.full(scope, receive, send)
+
+
+def get_wsgi_application():
+    django.setup(set_prefix=False)
+    if not settings.API_MIDDLEWARE_ROUTES['ENABLED']:
+        return WSGIHandler()
+    return RoutedWSGIHandler()
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    if not settings.API_MIDDLEWARE_ROUTES['ENABLED']:
+        return ASGIHandler()
+    return RoutedASGIHandler()
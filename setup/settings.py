@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -65,6 +66,19 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
 ]
 
+# Middleware of the stateless JWT API, see setup/handlers.py. The admin, the
+# back-office (session authentication) and the docs keep the full MIDDLEWARE.
+API_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+]
+
+API_MIDDLEWARE_ROUTES = {
+    'ENABLED': config('API_MIDDLEWARE_ENABLED', default=True, cast=bool),
+    'INCLUDE': ['/api/v1/'],
+    'EXCLUDE': ['/api/v1/backoffice/'],
+}
+
 ROOT_URLCONF = 'setup.urls'
 
 TEMPLATES = [
@@ -100,6 +114,16 @@ DATABASES = {
     }
 }
 
+# Password hashers, the first one hashes new passwords. Django's defaults, with
+# the PBKDF2 iterations taken from INSURED_PASSWORD_HASHING.
+PASSWORD_HASHERS = [
+    'core_app.hashers.InsuredPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -141,6 +165,9 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Runs the tests with INSURED_LAST_LOGIN['SYNC'], see core_app/tests/runner.py.
+TEST_RUNNER = 'core_app.tests.runner.InsuredTestRunner'
+
 CORS_ALLOW_ORIGINS = [
     'http://localhost:8000',
 ]
@@ -150,6 +177,32 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson when installed, the stdlib json module otherwise.
+    'DEFAULT_RENDERER_CLASSES': (
+        'core_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core_app.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# Keys used to sign and verify the tokens of Insureds. Tokens are signed with
+# ACTIVE_KID; KEYS_FILE may point to a JSON list of extra keys
+# ({"kid", "algorithm", "signing_key", "verifying_key"}) to rotate them.
+JWT_KEY_RING = {
+    'ACTIVE_KID': config('JWT_ACTIVE_KID', default=''),
+    'KEYS': [
+        {
+            'kid': config('JWT_KID', default='default'),
+            'algorithm': config('JWT_ALGORITHM'),
+            'signing_key': config('JWT_SECRET'),
+            'verifying_key': config('JWT_VERIFYING_KEY', default=''),
+        },
+    ],
+    'KEYS_FILE': config('JWT_KEYS_FILE', default=''),
 }
 
 SIMPLE_JWT = {
@@ -160,6 +213,85 @@ SIMPLE_JWT = {
     'ALGORITHM': config('JWT_ALGORITHM'),
 }
 
+INSURED_BULK_MAX_SIZE = config('INSURED_BULK_MAX_SIZE', default=200, cast=int)
+INSURED_BULK_CHUNK_SIZE = config('INSURED_BULK_CHUNK_SIZE', default=500, cast=int)
+
+# Caches the Insured loaded by InsuredJWTAuthentication. BACKEND names an
+# entry of CACHES to share it across workers, otherwise it is kept in-process.
+INSURED_PRINCIPAL_CACHE = {
+    'ENABLED': config('INSURED_PRINCIPAL_CACHE_ENABLED', default=False, cast=bool),
+    'MAX_SIZE': config('INSURED_PRINCIPAL_CACHE_MAX_SIZE', default=10000, cast=int),
+    'TTL': config('INSURED_PRINCIPAL_CACHE_TTL', default=60, cast=int),
+    'BACKEND': config('INSURED_PRINCIPAL_CACHE_BACKEND', default=''),
+}
+
+# Serves registration, login, edit and /insureds/me/ with the async views,
+# which authenticate and query with the async ORM and hash passwords on a pool
+# of INSURED_HASHING['MAX_WORKERS'] threads. Meant for ASGI servers (the `asgi`
+# service of docker-compose.yml).
+INSURED_ASYNC_VIEWS = config('INSURED_ASYNC_VIEWS', default=False, cast=bool)
+
+# Password hashing runs at most MAX_CONCURRENCY at once per process; requests
+# waiting longer than QUEUE_TIMEOUT seconds get a 503 with Retry-After.
+INSURED_HASHING = {
+    'MAX_WORKERS': config('INSURED_HASHING_MAX_WORKERS', default=os.cpu_count(), cast=int),
+    'MAX_CONCURRENCY': config('INSURED_HASHING_MAX_CONCURRENCY', default=os.cpu_count(), cast=int),
+    'QUEUE_TIMEOUT': config('INSURED_HASHING_QUEUE_TIMEOUT', default=2.0, cast=float),
+    'RETRY_AFTER': config('INSURED_HASHING_RETRY_AFTER', default=1, cast=int),
+}
+
+# last_login is buffered per process and written in bulk every FLUSH_INTERVAL
+# seconds or once MAX_PENDING insureds are waiting. SYNC writes on each login.
+INSURED_LAST_LOGIN = {
+    'SYNC': config('INSURED_LAST_LOGIN_SYNC', default=False, cast=bool),
+    'FLUSH_INTERVAL': config('INSURED_LAST_LOGIN_FLUSH_INTERVAL', default=5.0, cast=float),
+    'MAX_PENDING': config('INSURED_LAST_LOGIN_MAX_PENDING', default=1000, cast=int),
+}
+
+# Revoked tokens (logout, password change, admin) are kept in a Bloom filter
+# by each worker, refreshed every REFRESH_INTERVAL seconds and rebuilt every
+# REBUILD_INTERVAL seconds; only filter hits query the table. CAPACITY is the
+# number of revocations the filter holds at FALSE_POSITIVE_RATE.
+INSURED_REVOCATION = {
+    'ENABLED': config('INSURED_REVOCATION_ENABLED', default=True, cast=bool),
+    'REFRESH_INTERVAL': config('INSURED_REVOCATION_REFRESH_INTERVAL', default=5.0, cast=float),
+    'REBUILD_INTERVAL': config('INSURED_REVOCATION_REBUILD_INTERVAL', default=3600.0, cast=float),
+    'CAPACITY': config('INSURED_REVOCATION_CAPACITY', default=100000, cast=int),
+    'FALSE_POSITIVE_RATE': config('INSURED_REVOCATION_FALSE_POSITIVE_RATE', default=0.001, cast=float),
+}
+
+# PBKDF2_ITERATIONS is the work factor of new password hashes, see
+# `manage.py calibrate_hasher` (default: Django 5.2's). Hashes stored with
+# other parameters are rehashed after a successful login when UPGRADE is set,
+# on a background thread (at most MAX_PENDING waiting) unless SYNC.
+INSURED_PASSWORD_HASHING = {
+    'PBKDF2_ITERATIONS': config('INSURED_PBKDF2_ITERATIONS', default=1000000, cast=int),
+    'UPGRADE': config('INSURED_PASSWORD_UPGRADE', default=True, cast=bool),
+    'SYNC': config('INSURED_PASSWORD_UPGRADE_SYNC', default=False, cast=bool),
+    'MAX_PENDING': config('INSURED_PASSWORD_UPGRADE_MAX_PENDING', default=1000, cast=int),
+}
+
+# Responses of registrations sent with an Idempotency-Key are kept for TTL
+# seconds and replayed to retries; duplicates of a request in progress wait up
+# to WAIT_TIMEOUT seconds for it. BACKEND names an entry of CACHES (e.g. a
+# DatabaseCache) to share them across workers, otherwise they are kept
+# in-process, up to MAX_SIZE keys.
+INSURED_IDEMPOTENCY = {
+    'ENABLED': config('INSURED_IDEMPOTENCY_ENABLED', default=True, cast=bool),
+    'BACKEND': config('INSURED_IDEMPOTENCY_BACKEND', default=''),
+    'TTL': config('INSURED_IDEMPOTENCY_TTL', default=86400, cast=int),
+    'MAX_SIZE': config('INSURED_IDEMPOTENCY_MAX_SIZE', default=10000, cast=int),
+    'WAIT_TIMEOUT': config('INSURED_IDEMPOTENCY_WAIT_TIMEOUT', default=10.0, cast=float),
+    'LOCK_TIMEOUT': config('INSURED_IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int),
+}
+
+# Serves /api/schema/ (and so Swagger and Redoc) from a document kept in
+# memory, read from FILE when set or generated once otherwise.
+INSURED_SCHEMA = {
+    'CACHED': config('INSURED_SCHEMA_CACHED', default=False, cast=bool),
+    'FILE': config('INSURED_SCHEMA_FILE', default=''),
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Insured Lojacorr",
     "VERSION": "1.0.0",
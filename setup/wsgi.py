@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
-from django.core.wsgi import get_wsgi_application
+from setup.handlers import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'setup.settings')
 
 application = get_wsgi_application()
+
+# Builds the cached OpenAPI document before serving the first request.
+from core_app.schema import schema_cache  # noqa: E402
+
+if schema_cache.enabled:
+    schema_cache.load()